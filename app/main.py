@@ -2,6 +2,7 @@ from fastapi import FastAPI
 from app.routers import user, llm, vector_db, image_search
 from fastapi.middleware.cors import CORSMiddleware
 from app.middlewares.auth import AuthMiddleware
+from core.vector_db import qdrant_db, async_qdrant_db
 
 app = FastAPI(
     title="User Management API",
@@ -25,6 +26,12 @@ app.include_router(vector_db.router, prefix="/api/v1/vector_db", tags=["vector_d
 app.include_router(image_search.router, prefix="/api/v1/image_search", tags=["image_search"])
 
 
+@app.on_event("shutdown")
+async def flush_vector_writes():
+    await async_qdrant_db.flush()
+    qdrant_db.flush()
+
+
 @app.get("/")
 def root():
     return {"message": "Welcome to the FastAPI CRUD application"}
@@ -1,23 +1,56 @@
+import asyncio
 import time
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Request
 from app.schemas.image_search import (
     ImageList,
     ImageSearchRequest,
     ImageSearchResponse,
+    SimilarImagesRequest,
+    VlogRequest,
     BlogRequest,
     BlogResponse,
     GetPlanReq,
     VideoResponse,
 )
 from trip.generate_trip import plan_trip
-from trip.image_search import upload_image, image_search, generate_blog, generate_vlog
-from core.vector_db import qdrant_db
+from trip.image_search import (
+    aupload_image,
+    aimage_search,
+    asimilar_images,
+    generate_blog,
+    generate_vlog,
+)
+from starlette.concurrency import run_in_threadpool
+from core.config import settings
 import requests
 import jwt
 
 router = APIRouter()
 
 
+async def describe_files(files: list, caption: str, user_id: str):
+    """
+    Upload and describe files with at most IMAGE_UPLOAD_CONCURRENCY downloads
+    and vision calls at once. If one fails the others are cancelled.
+    """
+    limit = asyncio.Semaphore(settings.IMAGE_UPLOAD_CONCURRENCY)
+
+    async def describe(file):
+        async with limit:
+            return await aupload_image(
+                caption=caption, url=file.url, filename=file.name, user_id=user_id
+            )
+
+    tasks = [asyncio.create_task(describe(file)) for file in files]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
 @router.post("/upload", response_model=ImageList)
 async def prompt(req: ImageList, request: Request):
     token = request.headers.get("authorization")
@@ -29,14 +62,15 @@ async def prompt(req: ImageList, request: Request):
     files = req.files
     response = {"caption": caption, "files": []}
     try:
-        for file in files:
-            url = file.url
-            name = file.name
-            x = upload_image(caption=caption, url=url, filename=name, user_id=user_id)
+        descriptions = await describe_files(files, caption, user_id)
+        for file, x in zip(files, descriptions):
             print(x)
-            response["files"].append({"name": name, "url": url, "description": x})
+            response["files"].append(
+                {"name": file.name, "url": file.url, "description": x}
+            )
 
-        requests.post(
+        await run_in_threadpool(
+            requests.post,
             "http://172.28.31.70:3000/api/v1/posts",
             json=response,
             headers={
@@ -52,7 +86,17 @@ async def prompt(req: ImageList, request: Request):
 
 @router.post("/search", response_model=ImageSearchResponse)
 async def search(req: ImageSearchRequest):
-    return image_search(req.text, req.user_id)
+    return await aimage_search(
+        req.text,
+        req.user_id,
+        near=req.near.dict() if req.near else None,
+        bbox=req.bbox.dict() if req.bbox else None,
+    )
+
+
+@router.post("/similar", response_model=ImageSearchResponse)
+async def similar(req: SimilarImagesRequest):
+    return await asimilar_images(req.positive, req.user_id, req.negative)
 
 
 @router.post("/blog", response_model=BlogResponse)
@@ -69,11 +113,20 @@ async def generate_blogssss(req: BlogRequest, request: Request):
     end = int(time.time())
     start = end - 24 * 3600 * 5
 
-    return {"blog": generate_blog(start, end, user_id, authorization)}
+    blog = await run_in_threadpool(
+        generate_blog,
+        start,
+        end,
+        user_id,
+        authorization,
+        req.near.dict() if req.near else None,
+        req.bbox.dict() if req.bbox else None,
+    )
+    return {"blog": blog}
 
 
 @router.post("/vlog", response_model=VideoResponse)
-async def generate_vlogss(request: Request):
+async def generate_vlogss(request: Request, req: Optional[VlogRequest] = None):
     # start = req.start
     # end = req.end
     end = int(time.time())
@@ -86,7 +139,12 @@ async def generate_vlogss(request: Request):
     decoded_payload = jwt.decode(token, options={"verify_signature": False})
     user_id = decoded_payload["id"]
 
-    return {"filename": generate_vlog(start, end, user_id, authorization)}
+    near = req.near.dict() if req and req.near else None
+    bbox = req.bbox.dict() if req and req.bbox else None
+    filename = await run_in_threadpool(
+        generate_vlog, start, end, user_id, authorization, near, bbox
+    )
+    return {"filename": filename}
 
 
 @router.post("/get_plan")
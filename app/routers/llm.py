@@ -1,6 +1,12 @@
+import json
+
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from app.schemas.llm import PromptIn, PromptOut
 from core.langchain_prompts import prompts
+from core.langchain_init import langchain_cache, chatOpenAI, CostTrackerCallback
+from core.semantic_cache import SemanticCache
+from core.debug import *
 
 router = APIRouter()
 
@@ -15,3 +21,44 @@ async def prompt(prompt: PromptIn):
         }
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_events(chain, input_variables: dict):
+    """Token frames as the model produces them, then one usage frame."""
+    tracker = CostTrackerCallback(chatOpenAI.model_name, totals=None)
+    try:
+        async for chunk in chain.astream(input_variables, {"callbacks": [tracker]}):
+            if chunk.content:
+                yield sse("token", {"content": chunk.content})
+        yield sse("usage", tracker.usage())
+    except Exception as e:
+        error_message(f"Error streaming prompt: {e}")
+        yield sse("error", {"detail": str(e)})
+    yield sse("done", {})
+
+
+@router.post("/stream")
+async def stream_prompt(prompt: PromptIn):
+    if prompt.template not in prompts:
+        raise HTTPException(status_code=400, detail=f"Unknown template: {prompt.template}")
+    return StreamingResponse(
+        stream_events(prompts[prompt.template], prompt.input_variables),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/cache_stats")
+async def cache_stats():
+    return {
+        "exact": langchain_cache.stats(),
+        "semantic": {
+            template: chain.stats()
+            for template, chain in prompts.items()
+            if isinstance(chain, SemanticCache)
+        },
+    }
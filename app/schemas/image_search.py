@@ -25,11 +25,36 @@ class ImageSearch(BaseModel):
 
 class ImageSearchResponse(BaseModel):
     urls: List[str]
+    ids: List[str] = []
+
+
+class GeoNear(BaseModel):
+    lat: float
+    lon: float
+    radius_km: float
+
+
+class GeoBox(BaseModel):
+    top: float
+    left: float
+    bottom: float
+    right: float
 
 
 class ImageSearchRequest(BaseModel):
     text: str
     user_id: int
+    near: Optional[GeoNear] = None
+    bbox: Optional[GeoBox] = None
+
+    class Config:
+        orm_mode = True
+
+
+class SimilarImagesRequest(BaseModel):
+    positive: List[str]
+    negative: List[str] = []
+    user_id: int
 
     class Config:
         orm_mode = True
@@ -37,6 +62,8 @@ class ImageSearchRequest(BaseModel):
 class BlogRequest(BaseModel):
     start: int
     end: int
+    near: Optional[GeoNear] = None
+    bbox: Optional[GeoBox] = None
 
     class Config:
         orm_mode = True
@@ -49,6 +76,14 @@ class BlogResponse(BaseModel):
         orm_mode = True
 
 
+class VlogRequest(BaseModel):
+    near: Optional[GeoNear] = None
+    bbox: Optional[GeoBox] = None
+
+    class Config:
+        orm_mode = True
+
+
 class VideoResponse(BaseModel):
     filename: str
 
@@ -0,0 +1,106 @@
+"""
+REST vs gRPC throughput against a running Qdrant.
+
+Upserts the same synthetic points and runs the same searches over each
+transport, and reports upsert points/s and search queries/s, sequential
+and with concurrent callers.
+
+    docker run -p 6333:6333 -p 6334:6334 qdrant/qdrant
+    python benchmark_qdrant_transport.py --url http://localhost:6333
+"""
+
+import argparse
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from rich.console import Console
+from rich.table import Table
+
+from core.collection_config import CollectionConfig
+from core.vector_db import QdrantDB, build_query, qdrant_client_options
+
+TRANSPORTS = {
+    "rest": dict(prefer_grpc=False, pool_size=100, keepalive_connections=20),
+    "grpc": dict(prefer_grpc=True),
+    "grpc+gzip": dict(prefer_grpc=True, compression="gzip"),
+}
+
+
+def run_transport(name: str, options: dict, args, vectors, queries):
+    db = QdrantDB(
+        args.url,
+        api_key=args.api_key,
+        client_options=qdrant_client_options(**options),
+    )
+    collection_name = f"benchmark_transport_{name.replace('+', '_')}"
+    db.delete_collection(collection_name)
+    db.create_collection(collection_name, CollectionConfig(dimensions=args.dimensions))
+    ids = list(range(len(vectors)))
+
+    def upsert(start: int):
+        end = start + args.batch_size
+        db.bulk_insert(
+            collection_name,
+            vectors[start:end].tolist(),
+            [{"user_id": i % 10} for i in ids[start:end]],
+            ids[start:end],
+        )
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.parallel) as executor:
+        list(executor.map(upsert, range(0, len(vectors), args.batch_size)))
+    upsert_rate = len(vectors) / (time.perf_counter() - start_time)
+
+    def search(query):
+        return db.client.query_points(
+            collection_name, **build_query(query.tolist(), limit=args.limit)
+        )
+
+    start_time = time.perf_counter()
+    for query in queries:
+        search(query)
+    sequential_rate = len(queries) / (time.perf_counter() - start_time)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.parallel) as executor:
+        list(executor.map(search, queries))
+    concurrent_rate = len(queries) / (time.perf_counter() - start_time)
+
+    db.delete_collection(collection_name)
+    return [
+        name,
+        f"{upsert_rate:.0f}",
+        f"{sequential_rate:.0f}",
+        f"{concurrent_rate:.0f}",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://localhost:6333")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--dimensions", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--parallel", type=int, default=8)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--transports", nargs="*", default=list(TRANSPORTS))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(args.points, args.dimensions)).astype(np.float32)
+    queries = rng.normal(size=(args.queries, args.dimensions)).astype(np.float32)
+
+    table = Table(
+        title=f"{args.points} points x {args.dimensions} dims, {args.parallel} concurrent callers"
+    )
+    for column in ["transport", "upsert points/s", "search q/s", "concurrent search q/s"]:
+        table.add_column(column)
+    for name in args.transports:
+        table.add_row(*run_transport(name, TRANSPORTS[name], args, vectors, queries))
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
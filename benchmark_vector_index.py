@@ -0,0 +1,181 @@
+"""
+Recall and latency benchmark for vector index configurations.
+
+Loads a synthetic (or exported) set of image-description vectors into
+Qdrant once per configuration, runs a fixed query set and reports recall@k
+against exact search (NumpyDB), p50/p95/p99 latency and estimated vector
+memory.
+
+    python benchmark_vector_index.py --qdrant http://localhost:6333
+    python benchmark_vector_index.py --points 20000 --dimensions 3072 -k 20
+
+The default ":memory:" location is local Qdrant, which always searches
+exhaustively and ignores HNSW and quantization settings; point --qdrant at
+a server to measure those. Synthetic vectors do not concentrate their
+information in the leading dimensions the way Matryoshka embeddings do, so
+compare dimension settings on exported vectors (--vectors, either a .npy
+matrix or a directory written by export_collection.py).
+"""
+
+import argparse
+import os
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from core.collection_config import CollectionConfig
+from core.collection_export import load_vectors
+from core.vector_db import QdrantDB, NumpyDB, build_query
+
+VARIANTS = {
+    "float32": dict(config={}),
+    "float32 fast": dict(config={}, profile="fast"),
+    "float32 exact": dict(config={}, profile="exact"),
+    "hnsw m=32 ef=256": dict(config={"hnsw_m": 32, "hnsw_ef_construct": 256}),
+    "scalar int8": dict(config={"quantization": "scalar"}),
+    "binary": dict(config={"quantization": "binary", "oversampling": 3.0}),
+    "1024 dims": dict(config={"dimensions": 1024}),
+    "256 dims + scalar": dict(config={"dimensions": 256, "quantization": "scalar"}),
+}
+
+BYTES_PER_DIMENSION = {None: 4, "scalar": 1, "binary": 1 / 8}
+
+
+def synthetic_vectors(points: int, dimensions: int, clusters: int = 64, seed: int = 7):
+    """Clustered unit vectors, roughly how description embeddings group by topic."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=points)
+    vectors = centers[labels] + 0.6 * rng.normal(size=(points, dimensions)).astype(
+        np.float32
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def query_vectors(vectors, queries: int, seed: int = 11):
+    rng = np.random.default_rng(seed)
+    picked = vectors[rng.choice(len(vectors), size=queries, replace=False)]
+    noisy = picked + 0.3 * rng.normal(size=picked.shape).astype(np.float32)
+    return noisy / np.linalg.norm(noisy, axis=1, keepdims=True)
+
+
+def truncate(vectors, dimensions: int):
+    """Matryoshka truncation: keep the leading dimensions and renormalize."""
+    vectors = vectors[:, :dimensions]
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def estimate_memory(config: CollectionConfig, points: int):
+    quantized = BYTES_PER_DIMENSION[config.quantization] * config.dimensions * points
+    originals = 4 * config.dimensions * points
+    if config.quantization is None:
+        return originals if not config.on_disk else 0
+    return quantized + (0 if config.on_disk else originals)
+
+
+def exact_neighbours(vectors, queries, k: int):
+    db = NumpyDB(dtype="float32")
+    db.create_collection("exact", CollectionConfig(dimensions=vectors.shape[1]))
+    ids = list(range(len(vectors)))
+    db.bulk_insert("exact", vectors.tolist(), [{} for _ in ids], ids)
+    return [
+        {point.id for point in db.search_by_vector("exact", query, limit=k)}
+        for query in queries
+    ]
+
+
+def run_variant(db: QdrantDB, name: str, variant: dict, vectors, queries, truth, k: int):
+    config = CollectionConfig(**{"dimensions": vectors.shape[1], **variant["config"]})
+    config.dimensions = min(config.dimensions, vectors.shape[1])
+    collection_name = "benchmark_" + "".join(c if c.isalnum() else "_" for c in name)
+    db.delete_collection(collection_name)
+    db.create_collection(collection_name, config)
+    data = truncate(vectors, config.dimensions)
+    ids = list(range(len(data)))
+    start = time.time()
+    for i in range(0, len(data), 256):
+        db.bulk_insert(
+            collection_name,
+            data[i : i + 256].tolist(),
+            [{} for _ in ids[i : i + 256]],
+            ids[i : i + 256],
+        )
+    load_time = time.time() - start
+
+    search_params = config.search_params(variant.get("profile"))
+    latencies = []
+    recalls = []
+    for query, expected in zip(truncate(queries, config.dimensions), truth):
+        start = time.perf_counter()
+        response = db.client.query_points(
+            collection_name,
+            **build_query(query.tolist(), limit=k, search_params=search_params),
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {point.id for point in response.points}
+        recalls.append(len(found & expected) / k)
+    db.delete_collection(collection_name)
+
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    return {
+        "variant": name,
+        "recall": float(np.mean(recalls)),
+        "p50": p50,
+        "p95": p95,
+        "p99": p99,
+        "memory_mb": estimate_memory(config, len(data)) / 2**20,
+        "load_s": load_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--qdrant", default=":memory:")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--vectors", default=None, help=".npy matrix or export directory")
+    parser.add_argument("--using", default=None, help="vector name to read from an export")
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--dimensions", type=int, default=3072)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--variants", nargs="*", default=list(VARIANTS))
+    args = parser.parse_args()
+
+    if args.vectors and os.path.isdir(args.vectors):
+        vectors = load_vectors(args.vectors, args.using).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    elif args.vectors:
+        vectors = np.load(args.vectors, mmap_mode="r").astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    else:
+        vectors = synthetic_vectors(args.points, args.dimensions)
+    queries = query_vectors(vectors, args.queries)
+    truth = exact_neighbours(vectors, queries, args.k)
+
+    db = QdrantDB(args.qdrant, api_key=args.api_key)
+    results = [
+        run_variant(db, name, VARIANTS[name], vectors, queries, truth, args.k)
+        for name in args.variants
+    ]
+
+    table = Table(
+        title=f"{len(vectors)} points x {vectors.shape[1]} dims, {args.queries} queries, recall@{args.k}"
+    )
+    for column in ["variant", "recall", "p50 ms", "p95 ms", "p99 ms", "vector RAM MB", "load s"]:
+        table.add_column(column)
+    for r in results:
+        table.add_row(
+            r["variant"],
+            f"{r['recall']:.3f}",
+            f"{r['p50']:.2f}",
+            f"{r['p95']:.2f}",
+            f"{r['p99']:.2f}",
+            f"{r['memory_mb']:.1f}",
+            f"{r['load_s']:.1f}",
+        )
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
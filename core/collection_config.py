@@ -0,0 +1,132 @@
+from typing import List, Literal, Optional
+from pydantic import BaseModel
+from qdrant_client import models
+
+# One point per image, with a named vector for each view of it.
+IMAGE_VECTORS = ["foreground", "background", "caption"]
+
+# Per-request search settings. Interactive search uses "fast"; batch jobs
+# that care more about recall than latency use "accurate" or "exact".
+SEARCH_PROFILES = {
+    "fast": {"hnsw_ef": 64, "oversampling": 1.5},
+    "accurate": {"hnsw_ef": 512, "oversampling": 4.0},
+    "exact": {"exact": True},
+}
+
+
+class CollectionConfig(BaseModel):
+    """
+    How a collection stores and searches its vectors.
+
+    dimensions below the model's native size use Matryoshka truncation
+    (the `dimensions` parameter of the embeddings API). With quantization
+    enabled, the compressed vectors stay in RAM and the originals can move
+    to disk, where they are only read to rescore the oversampled candidates.
+
+    hnsw_m and hnsw_ef_construct set graph quality at build time; hnsw_ef is
+    the default search beam, which profiles and per-request arguments of
+    search override. payload_m builds per-user links so searches filtered
+    by user_id stay on the graph.
+    """
+
+    vector_names: List[str] = ["content"]
+    sparse_vector: Optional[str] = None
+    model: str = "text-embedding-3-large"
+    dimensions: int = 3072
+    on_disk: bool = False
+    quantization: Optional[Literal["scalar", "binary"]] = None
+    quantization_always_ram: bool = True
+    rescore: bool = True
+    oversampling: float = 2.0
+    hnsw_m: int = 16
+    hnsw_ef_construct: int = 100
+    hnsw_on_disk: bool = False
+    payload_m: int = 16
+    hnsw_ef: Optional[int] = None
+    exact: bool = False
+
+    def vectors_config(self):
+        return {
+            name: models.VectorParams(
+                size=self.dimensions,
+                distance=models.Distance.COSINE,
+                on_disk=self.on_disk,
+            )
+            for name in self.vector_names
+        }
+
+    def sparse_vectors_config(self):
+        if self.sparse_vector is None:
+            return None
+        return {
+            self.sparse_vector: models.SparseVectorParams(
+                modifier=models.Modifier.IDF
+            )
+        }
+
+    def quantization_config(self):
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=self.quantization_always_ram,
+                )
+            )
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(
+                    always_ram=self.quantization_always_ram
+                )
+            )
+        return None
+
+    def hnsw_config(self):
+        return models.HnswConfigDiff(
+            m=self.hnsw_m,
+            ef_construct=self.hnsw_ef_construct,
+            on_disk=self.hnsw_on_disk,
+            payload_m=self.payload_m,
+        )
+
+    def search_params(self, profile: str = None, **overrides):
+        """
+        SearchParams from the collection defaults, then the named profile,
+        then any non-None overrides (hnsw_ef, exact, rescore, oversampling).
+        """
+        params = {
+            "hnsw_ef": self.hnsw_ef,
+            "exact": self.exact,
+            "rescore": self.rescore,
+            "oversampling": self.oversampling,
+        }
+        if profile is not None:
+            params.update(SEARCH_PROFILES[profile])
+        params.update({k: v for k, v in overrides.items() if v is not None})
+        quantization = None
+        if self.quantization is not None:
+            quantization = models.QuantizationSearchParams(
+                rescore=params["rescore"], oversampling=params["oversampling"]
+            )
+        if params["hnsw_ef"] is None and not params["exact"] and quantization is None:
+            return None
+        return models.SearchParams(
+            hnsw_ef=params["hnsw_ef"],
+            exact=params["exact"],
+            quantization=quantization,
+        )
+
+
+collection_configs = {
+    "image_descriptions": CollectionConfig(
+        vector_names=IMAGE_VECTORS, sparse_vector="text"
+    ),
+}
+
+
+def get_collection_config(collection_name: str) -> CollectionConfig:
+    return collection_configs.get(collection_name, CollectionConfig())
+
+
+def register_collection(collection_name: str, config: CollectionConfig):
+    collection_configs[collection_name] = config
@@ -0,0 +1,269 @@
+"""
+Export layout, one directory per collection:
+
+    manifest.json                 collection config, vector names, shard list
+    shard-00000/ids.json          point ids, in row order
+    shard-00000/<name>.npy        one matrix per dense vector (zero rows where absent)
+    shard-00000/present.npz       per dense vector, which points have it
+    shard-00000/<name>.sparse.npz indices, values, row offsets and presence per sparse vector
+    shard-00000/payload.json.gz   payload columns: key -> {"rows", "values"}
+"""
+
+import gzip
+import json
+import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from qdrant_client import models
+
+from .collection_config import CollectionConfig, get_collection_config, register_collection
+from .vector_db import (
+    QdrantDB,
+    qdrant_db,
+    retry_with_backoff,
+    load_checkpoint,
+    save_checkpoint,
+)
+from .debug import *
+
+
+def shard_name(number: int):
+    return f"shard-{number:05d}"
+
+
+def collection_layout(db: QdrantDB, collection_name: str):
+    """The config registered for the collection, with the vectors it really has."""
+    params = db.client.get_collection(collection_name).config.params
+    if not isinstance(params.vectors, dict):
+        raise ValueError(
+            f"Collection {collection_name} has an unnamed vector; only named vectors can be exported"
+        )
+    config = get_collection_config(collection_name).model_copy()
+    config.vector_names = list(params.vectors)
+    config.dimensions = next(iter(params.vectors.values())).size
+    config.sparse_vector = next(iter(params.sparse_vectors or {}), None)
+    return config
+
+
+def payload_columns(payloads: list):
+    columns = {}
+    for row, payload in enumerate(payloads):
+        for key, value in payload.items():
+            column = columns.setdefault(key, {"rows": [], "values": []})
+            column["rows"].append(row)
+            column["values"].append(value)
+    return columns
+
+
+def payload_rows(columns: dict, count: int):
+    payloads = [{} for _ in range(count)]
+    for key, column in columns.items():
+        for row, value in zip(column["rows"], column["values"]):
+            payloads[row][key] = value
+    return payloads
+
+
+def write_shard(path: str, points: list, config: CollectionConfig, dtype: str):
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, "ids.json"), "w") as f:
+        json.dump([point.id for point in points], f)
+    present = {}
+    for name in config.vector_names:
+        present[name] = np.asarray([name in point.vector for point in points], dtype=bool)
+        vectors = [point.vector[name] for point in points if name in point.vector]
+        matrix = np.zeros(
+            (len(points), len(vectors[0]) if vectors else config.dimensions), dtype=dtype
+        )
+        matrix[present[name]] = vectors
+        np.save(os.path.join(path, f"{name}.npy"), matrix)
+    np.savez(os.path.join(path, "present.npz"), **present)
+    if config.sparse_vector:
+        vectors = [point.vector.get(config.sparse_vector) for point in points]
+        present = [v is not None for v in vectors]
+        vectors = [v or models.SparseVector(indices=[], values=[]) for v in vectors]
+        np.savez(
+            os.path.join(path, f"{config.sparse_vector}.sparse.npz"),
+            indices=np.asarray([i for v in vectors for i in v.indices], dtype=np.uint32),
+            values=np.asarray([x for v in vectors for x in v.values], dtype=np.float32),
+            offsets=np.cumsum([0] + [len(v.indices) for v in vectors]),
+            present=np.asarray(present, dtype=bool),
+        )
+    with gzip.open(os.path.join(path, "payload.json.gz"), "wt") as f:
+        json.dump(payload_columns([point.payload for point in points]), f)
+
+
+def read_shard(path: str, manifest: dict):
+    """Ids, per-point vector dicts and payloads of one shard. Vectors are memory mapped."""
+    with open(os.path.join(path, "ids.json")) as f:
+        ids = json.load(f)
+    dense = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        for name in manifest["config"]["vector_names"]
+    }
+    present = {name: np.ones(len(ids), dtype=bool) for name in dense}
+    if os.path.exists(os.path.join(path, "present.npz")):
+        present.update(np.load(os.path.join(path, "present.npz")))
+    sparse_name = manifest["config"]["sparse_vector"]
+    sparse = None
+    if sparse_name:
+        sparse = dict(np.load(os.path.join(path, f"{sparse_name}.sparse.npz")))
+        if "present" not in sparse:
+            # Older exports: an empty row was a point without the vector.
+            sparse["present"] = np.diff(sparse["offsets"]) > 0
+    with gzip.open(os.path.join(path, "payload.json.gz"), "rt") as f:
+        payloads = payload_rows(json.load(f), len(ids))
+
+    def vectors(start: int, end: int):
+        batch = [
+            {
+                name: matrix[row].astype(np.float32).tolist()
+                for name, matrix in dense.items()
+                if present[name][row]
+            }
+            for row in range(start, end)
+        ]
+        if sparse is not None:
+            for vector, row in zip(batch, range(start, end)):
+                if not sparse["present"][row]:
+                    continue
+                a, b = sparse["offsets"][row], sparse["offsets"][row + 1]
+                vector[sparse_name] = models.SparseVector(
+                    indices=sparse["indices"][a:b].tolist(),
+                    values=sparse["values"][a:b].tolist(),
+                )
+        return batch
+
+    return ids, vectors, payloads
+
+
+def export_collection(
+    collection_name: str,
+    path: str,
+    shard_size: int = 4096,
+    page_size: int = 256,
+    dtype: str = "float32",
+    db: QdrantDB = qdrant_db,
+):
+    """
+    Stream a collection to path. At most one shard of points is held in
+    memory; float16 halves the size of the vector files.
+    """
+    info_message(f"Exporting collection: {collection_name} to {path}")
+    start_time = time.time()
+    config = collection_layout(db, collection_name)
+    os.makedirs(path, exist_ok=True)
+    shards = []
+    points = []
+    offset = None
+    while True:
+        page, offset = retry_with_backoff(
+            lambda: db.client.scroll(
+                collection_name,
+                limit=page_size,
+                offset=offset,
+                with_payload=True,
+                with_vectors=True,
+            ),
+            description=f"scroll {collection_name}",
+        )
+        points.extend(page)
+        while len(points) >= shard_size or (offset is None and points):
+            shard, points = points[:shard_size], points[shard_size:]
+            name = shard_name(len(shards))
+            write_shard(os.path.join(path, name), shard, config, dtype)
+            shards.append({"name": name, "points": len(shard)})
+            info_message(f"Wrote {name} ({sum(s['points'] for s in shards)} points)")
+        if offset is None:
+            break
+    manifest = {
+        "collection": collection_name,
+        "config": config.model_dump(),
+        "dtype": dtype,
+        "shards": shards,
+    }
+    with open(os.path.join(path, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    count = sum(s["points"] for s in shards)
+    success_message(
+        f"Exported {count} points in {len(shards)} shards in {time.time() - start_time:.1f}s"
+    )
+    return manifest
+
+
+def load_manifest(path: str):
+    with open(os.path.join(path, "manifest.json")) as f:
+        return json.load(f)
+
+
+def import_collection(
+    path: str,
+    collection_name: str = None,
+    batch_size: int = 256,
+    parallel: int = 4,
+    checkpoint_path: str = None,
+    db: QdrantDB = qdrant_db,
+):
+    """
+    Restore an export into collection_name (by default the exported name),
+    creating it with the exported config. Up to `parallel` shards upload at
+    once; finished shards go to checkpoint_path so an interrupted restore
+    skips them when re-run.
+    """
+    manifest = load_manifest(path)
+    collection_name = collection_name or manifest["collection"]
+    config = CollectionConfig(**manifest["config"])
+    register_collection(collection_name, config)
+    if db.get_collection(collection_name) is None:
+        db.create_collection(collection_name, config)
+    done = load_checkpoint(checkpoint_path)
+    todo = [shard for shard in manifest["shards"] if shard["name"] not in done]
+    info_message(
+        f"Importing {len(todo)} of {len(manifest['shards'])} shards into {collection_name}"
+    )
+    start_time = time.time()
+
+    def restore(shard):
+        ids, vectors, payloads = read_shard(os.path.join(path, shard["name"]), manifest)
+        for i in range(0, len(ids), batch_size):
+            end = min(i + batch_size, len(ids))
+            batch = vectors(i, end)
+            retry_with_backoff(
+                lambda: db.bulk_insert(
+                    collection_name, batch, payloads[i:end], ids[i:end]
+                ),
+                description=f"upsert {shard['name']}",
+            )
+        return shard
+
+    count = 0
+    with ThreadPoolExecutor(max_workers=parallel) as executor:
+        futures = [executor.submit(restore, shard) for shard in todo]
+        for future in as_completed(futures):
+            try:
+                shard = future.result()
+            except Exception as e:
+                error_message(f"Error: {e}")
+                continue
+            done.add(shard["name"])
+            save_checkpoint(checkpoint_path, done)
+            count += shard["points"]
+            info_message(f"Restored {shard['name']} ({count} points)")
+    success_message(
+        f"Imported {count} points into {collection_name} in {time.time() - start_time:.1f}s"
+    )
+    return count
+
+
+def load_vectors(path: str, using: str = None):
+    """All vectors of one dense name in an export, as a single matrix."""
+    manifest = load_manifest(path)
+    using = using or manifest["config"]["vector_names"][0]
+    matrices = []
+    for shard in manifest["shards"]:
+        matrix = np.load(os.path.join(path, shard["name"], f"{using}.npy"), mmap_mode="r")
+        present = os.path.join(path, shard["name"], "present.npz")
+        if os.path.exists(present):
+            matrix = matrix[np.load(present)[using]]
+        matrices.append(matrix)
+    return np.concatenate(matrices)
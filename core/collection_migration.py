@@ -0,0 +1,232 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from qdrant_client import models
+
+from .collection_config import CollectionConfig, get_collection_config, register_collection
+from .langchain_init import get_embeddings
+from .sparse_encoder import bm25_document_vector
+from .vector_db import QdrantDB, qdrant_db, retry_with_backoff
+from .debug import *
+
+# Points are stamped with created_at before they are uploaded, so catch-up
+# looks this many seconds further back than the migration start.
+CATCH_UP_MARGIN = 300
+
+
+def load_migration_checkpoint(checkpoint_path: str):
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            return json.load(f)
+    return {"offset": None, "points": 0, "done": False, "started_at": None}
+
+
+def save_migration_checkpoint(checkpoint_path: str, state: dict):
+    if not checkpoint_path:
+        return
+    with open(checkpoint_path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+
+def reembed_points(points: list, config: CollectionConfig, text_fields: dict):
+    """Embed the stored text of each point into the vectors config describes."""
+    embeddings = get_embeddings(config.model, config.dimensions)
+    names = list(text_fields)
+    texts = [point.payload.get(text_fields[name], "") for point in points for name in names]
+    flat = embeddings.embed_documents(texts)
+    vectors = []
+    for i, point in enumerate(points):
+        vector = dict(zip(names, flat[i * len(names) : (i + 1) * len(names)]))
+        if config.sparse_vector:
+            vector[config.sparse_vector] = bm25_document_vector(
+                " ".join(point.payload.get(text_fields[name], "") for name in names)
+            )
+        vectors.append(vector)
+    return vectors
+
+
+def catch_up(
+    db: QdrantDB,
+    source: str,
+    target: str,
+    since: int,
+    config: CollectionConfig,
+    text_fields: dict,
+    batch_size: int = 256,
+):
+    """
+    Copy the points of source created since `since` into target. Ids are
+    content-derived, so points that were already copied are just rewritten.
+    """
+    since_filter = models.Filter(
+        must=[models.FieldCondition(key="created_at", range=models.Range(gte=since))]
+    )
+    copied = 0
+    offset = None
+    while True:
+        points, offset = db.client.scroll(
+            source,
+            scroll_filter=since_filter,
+            limit=batch_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=False,
+        )
+        if points:
+            vectors = reembed_points(points, config, text_fields)
+            payloads = [point.payload for point in points]
+            retry_with_backoff(
+                lambda: db.bulk_insert(target, vectors, payloads),
+                description=f"upsert into {target}",
+            )
+            copied += len(points)
+        if offset is None:
+            break
+    info_message(f"Caught up {copied} points written to {source} during the migration")
+    return copied
+
+
+def swap_alias(
+    db: QdrantDB,
+    alias: str,
+    target: str,
+    drop_source: bool = False,
+    before_drop=None,
+):
+    """
+    Point alias at target in one atomic operation. The first migration of
+    a collection that is still a physical collection has to delete it
+    before the alias can take its name, so it needs drop_source;
+    before_drop is called right before that delete, to copy the last writes.
+    """
+    aliases = {a.alias_name for a in db.client.get_aliases().aliases}
+    operations = []
+    if alias in aliases:
+        operations.append(
+            models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias))
+        )
+    elif db.get_collection(alias) is not None:
+        if not drop_source:
+            error_message(
+                f"{alias} is a collection, not an alias. Re-run with drop_source to replace it."
+            )
+            return False
+        if before_drop is not None:
+            before_drop()
+        db.client.delete_collection(alias)
+    operations.append(
+        models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=target, alias_name=alias)
+        )
+    )
+    db.client.update_collection_aliases(operations)
+    success_message(f"Alias {alias} now points to {target}")
+    return True
+
+
+def reembed_collection(
+    source: str,
+    target: str,
+    alias: str = None,
+    config: CollectionConfig = None,
+    text_fields: dict = None,
+    batch_size: int = 256,
+    parallel: int = 4,
+    checkpoint_path: str = None,
+    drop_source: bool = False,
+    db: QdrantDB = qdrant_db,
+):
+    """
+    Copy source into a new collection, re-embedding the stored text with
+    config (by default the registered config of alias, or of target).
+
+    Pages are scrolled in order while up to `parallel` pages are embedded and
+    upserted concurrently. The checkpoint holds the scroll offset after the
+    last page whose predecessors have all been written, so a restart resumes
+    there; re-written points get the same content-derived id.
+
+    Points uploaded to source while the copy runs are picked up by catch-up
+    passes over created_at >= migration start: one after the copy, one right
+    before a dropped source is deleted, and one after the alias switch for
+    writes that landed just before it. When alias is given it is switched
+    to target once the copy is complete.
+    """
+    config = config or get_collection_config(alias or target)
+    text_fields = text_fields or {name: name for name in config.vector_names}
+    register_collection(target, config)
+    if alias:
+        register_collection(alias, config)
+    state = load_migration_checkpoint(checkpoint_path)
+    if state.get("started_at") is None:
+        state["started_at"] = int(time.time()) - CATCH_UP_MARGIN
+        save_migration_checkpoint(checkpoint_path, state)
+
+    def copy_new_points():
+        catch_up(db, source, target, state["started_at"], config, text_fields, batch_size)
+
+    if not state["done"]:
+        if db.get_collection(target) is None:
+            db.create_collection(target, config)
+        info_message(f"Re-embedding {source} into {target}")
+        start_time = time.time()
+        migrated = 0
+        in_flight = []
+
+        def migrate(points):
+            vectors = reembed_points(points, config, text_fields)
+            payloads = [point.payload for point in points]
+            retry_with_backoff(
+                lambda: db.bulk_insert(target, vectors, payloads),
+                description=f"upsert into {target}",
+            )
+            return len(points)
+
+        def drain(limit):
+            nonlocal migrated
+            while len(in_flight) > limit or (in_flight and in_flight[0][0].done()):
+                future, next_offset = in_flight.pop(0)
+                migrated += future.result()
+                state["offset"] = next_offset
+                state["points"] += future.result()
+                save_migration_checkpoint(checkpoint_path, state)
+                elapsed = time.time() - start_time
+                info_message(
+                    f"Migrated {state['points']} points ({migrated / elapsed:.0f} points/s)"
+                )
+
+        with ThreadPoolExecutor(max_workers=parallel) as executor:
+            offset = state["offset"]
+            while True:
+                points, offset = db.client.scroll(
+                    source,
+                    limit=batch_size,
+                    offset=offset,
+                    with_payload=True,
+                    with_vectors=False,
+                )
+                if points:
+                    in_flight.append((executor.submit(migrate, points), offset))
+                drain(parallel)
+                if offset is None:
+                    break
+            drain(0)
+
+        elapsed = time.time() - start_time
+        state["done"] = True
+        save_migration_checkpoint(checkpoint_path, state)
+        success_message(
+            f"Re-embedded {migrated} points in {elapsed:.1f}s ({migrated / max(elapsed, 1e-9):.0f} points/s)"
+        )
+    if state.get("swapped"):
+        return state
+    copy_new_points()
+    if alias:
+        dropped = drop_source and source == alias
+        if swap_alias(db, alias, target, drop_source, before_drop=copy_new_points):
+            state["swapped"] = True
+            save_migration_checkpoint(checkpoint_path, state)
+            if not dropped:
+                copy_new_points()
+    return state
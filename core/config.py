@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from pydantic_settings import BaseSettings
 import requests_cache
 
@@ -24,7 +25,40 @@ class Settings(BaseSettings):
     
     SUPABASE_PROJECT_URL: str
     SUPABASE_ANON_KEY: str
-    
+
+    EMBEDDING_CACHE_SIZE: int = 4096
+    EMBEDDING_CACHE_PATH: str = ".embeddings.db"
+    EMBEDDING_STORE_DTYPE: str = "float16"
+    EMBEDDING_BATCH_MAX_SIZE: int = 256
+    EMBEDDING_BATCH_MAX_WAIT: float = 0.005
+    EMBEDDING_BATCH_MAX_IN_FLIGHT: int = 4
+    EMBEDDING_BATCH_MAX_RETRIES: int = 3
+
+    QDRANT_WRITE_BEHIND: bool = False
+    QDRANT_WRITE_BEHIND_MAX_POINTS: int = 64
+    QDRANT_WRITE_BEHIND_MAX_DELAY: float = 0.05
+
+    LLM_CACHE_PATH: str = ".llm_cache"
+    LLM_CACHE_SHARDS: int = 8
+    LLM_CACHE_MAX_ENTRIES: int = 100000
+    LLM_CACHE_TTLS: Dict[str, Optional[int]] = {}
+
+    SEMANTIC_CACHE: bool = False
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 10000
+    SEMANTIC_CACHE_THRESHOLDS: Dict[str, float] = {}
+    SEMANTIC_CACHE_VERIFY_RATE: float = 0.05
+
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_GRPC_COMPRESSION: str = ""
+    QDRANT_TIMEOUT: int = 60
+    QDRANT_SEARCH_TIMEOUT: int = 10
+    QDRANT_POOL_SIZE: int = 100
+    QDRANT_KEEPALIVE_CONNECTIONS: int = 20
+    QDRANT_MAX_MESSAGE_MB: int = 64
+
+    IMAGE_UPLOAD_CONCURRENCY: int = 4
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,249 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different queries share a cache entry."""
+    text = unicodedata.normalize("NFKC", text)
+    return " ".join(text.split()).casefold()
+
+
+def content_key(model: str, dimensions: int, text: str) -> bytes:
+    return hashlib.sha256(f"{model}\0{dimensions}\0{text}".encode("utf-8")).digest()
+
+
+def encode_vector(embedding, dtype: str):
+    """Compact form of a vector: float16, or int8 with a per-vector scale."""
+    vector = np.asarray(embedding, dtype=np.float32)
+    if dtype == "int8":
+        scale = float(np.abs(vector).max()) / 127 or 1.0
+        return np.round(vector / scale).astype(np.int8), scale
+    return vector.astype(dtype), 1.0
+
+
+def decode_vector(vector, scale: float) -> list:
+    return (vector.astype(np.float32) * scale).tolist()
+
+
+class EmbeddingStore:
+    """
+    Content-addressed store in front of an embeddings model.
+
+    Entries are keyed by sha256(model, dimensions, text), so a text is sent
+    to the API once per model and size however often it is uploaded or
+    searched. Vectors are kept compact (float16, or int8 with a scale) in an
+    LRU memory tier of max_size entries and, when a path is given, in a
+    SQLite file shared by every model. With normalize, texts are normalized
+    before hashing and embedding (queries); documents are embedded as given.
+    The async methods run SQLite reads and writes in a worker thread, so a
+    memory miss never blocks the event loop on disk I/O.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        model: str,
+        dimensions: int,
+        max_size: int = 4096,
+        path: str = None,
+        dtype: str = "float16",
+        normalize: bool = False,
+    ):
+        self.embeddings = embeddings
+        self.model = model
+        self.dimensions = dimensions
+        self.max_size = max_size
+        self.path = path
+        self.dtype = dtype
+        self.normalize = normalize
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS vectors"
+                " (key BLOB PRIMARY KEY, dtype TEXT, scale REAL, vector BLOB)"
+            )
+            self._db.commit()
+
+    def _text(self, text: str) -> str:
+        return normalize_text(text) if self.normalize else text
+
+    def _key(self, text: str) -> bytes:
+        return content_key(self.model, self.dimensions, self._text(text))
+
+    def _remember(self, key: bytes, entry: tuple):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_size:
+            self._memory.popitem(last=False)
+
+    def _get_memory(self, keys: list) -> list:
+        with self._lock:
+            found = []
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    found.append(decode_vector(*self._memory[key]))
+                else:
+                    found.append(None)
+            return found
+
+    def _get_disk(self, keys: list) -> dict:
+        rows = []
+        if self._db is not None:
+            with self._db_lock:
+                for key in keys:
+                    row = self._db.execute(
+                        "SELECT dtype, scale, vector FROM vectors WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        rows.append((key, row))
+        found = {}
+        with self._lock:
+            for key, (dtype, scale, blob) in rows:
+                entry = (np.frombuffer(blob, dtype=dtype), scale)
+                self._remember(key, entry)
+                found[key] = decode_vector(*entry)
+            self.hits += len(found)
+            self.disk_hits += len(found)
+            self.misses += len(set(keys)) - len(found)
+        return found
+
+    def _fill(self, keys: list, embeddings: list, disk: dict) -> list:
+        return [
+            embedding if embedding is not None else disk.get(key)
+            for key, embedding in zip(keys, embeddings)
+        ]
+
+    def get_many(self, texts: list) -> list:
+        keys = [self._key(text) for text in texts]
+        embeddings = self._get_memory(keys)
+        missing = [key for key, embedding in zip(keys, embeddings) if embedding is None]
+        disk = self._get_disk(missing) if missing else {}
+        return self._fill(keys, embeddings, disk)
+
+    async def aget_many(self, texts: list) -> list:
+        keys = [self._key(text) for text in texts]
+        embeddings = self._get_memory(keys)
+        missing = [key for key, embedding in zip(keys, embeddings) if embedding is None]
+        disk = {}
+        if missing:
+            if self._db is None:
+                disk = self._get_disk(missing)
+            else:
+                disk = await asyncio.to_thread(self._get_disk, missing)
+        return self._fill(keys, embeddings, disk)
+
+    def get(self, text: str):
+        return self.get_many([text])[0]
+
+    def _remember_many(self, texts: list, embeddings: list):
+        """Keep vectors in memory; return the SQLite rows and the vectors as stored."""
+        rows = []
+        stored = []
+        with self._lock:
+            for text, embedding in zip(texts, embeddings):
+                key = self._key(text)
+                vector, scale = encode_vector(embedding, self.dtype)
+                self._remember(key, (vector, scale))
+                rows.append((key, self.dtype, scale, vector.tobytes()))
+                stored.append(decode_vector(vector, scale))
+        return rows, stored
+
+    def _write(self, rows: list):
+        if self._db is None or not rows:
+            return
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO vectors (key, dtype, scale, vector)"
+                " VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._db.commit()
+
+    def put_many(self, texts: list, embeddings: list) -> list:
+        """
+        Store vectors and return them as stored, so a text always yields the
+        same vector (and the same content-derived point id) hit or miss.
+        """
+        rows, stored = self._remember_many(texts, embeddings)
+        self._write(rows)
+        return stored
+
+    async def aput_many(self, texts: list, embeddings: list) -> list:
+        rows, stored = self._remember_many(texts, embeddings)
+        if self._db is not None and rows:
+            await asyncio.to_thread(self._write, rows)
+        return stored
+
+    def put(self, text: str, embedding: list) -> list:
+        return self.put_many([text], [embedding])[0]
+
+    def embed_query(self, text: str) -> list:
+        embedding = self.get(text)
+        if embedding is None:
+            embedding = self.put(
+                text, self.embeddings.embed_query(self._text(text))
+            )
+        return embedding
+
+    async def aembed_query(self, text: str) -> list:
+        embedding = (await self.aget_many([text]))[0]
+        if embedding is None:
+            vector = await self.embeddings.aembed_query(self._text(text))
+            embedding = (await self.aput_many([text], [vector]))[0]
+        return embedding
+
+    def _missing(self, texts: list, embeddings: list) -> list:
+        return list(
+            dict.fromkeys(
+                self._text(text)
+                for text, embedding in zip(texts, embeddings)
+                if embedding is None
+            )
+        )
+
+    def _merge(self, texts: list, embeddings: list, computed: dict):
+        return [
+            embedding if embedding is not None else computed[self._text(text)]
+            for text, embedding in zip(texts, embeddings)
+        ]
+
+    def embed_documents(self, texts: list) -> list:
+        """Embed many texts, sending only the unseen ones in a single request."""
+        embeddings = self.get_many(texts)
+        missing = self._missing(texts, embeddings)
+        computed = self.embeddings.embed_documents(missing) if missing else []
+        computed = dict(zip(missing, self.put_many(missing, computed)))
+        return self._merge(texts, embeddings, computed)
+
+    async def aembed_documents(self, texts: list) -> list:
+        embeddings = await self.aget_many(texts)
+        missing = self._missing(texts, embeddings)
+        computed = await self.embeddings.aembed_documents(missing) if missing else []
+        computed = dict(zip(missing, await self.aput_many(missing, computed)))
+        return self._merge(texts, embeddings, computed)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0,
+            "size": len(self._memory),
+        }
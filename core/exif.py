@@ -0,0 +1,54 @@
+import time
+from datetime import datetime
+from PIL import Image
+
+from .debug import *
+
+EXIF_IFD = 0x8769
+GPS_IFD = 0x8825
+DATETIME = 306
+DATETIME_ORIGINAL = 36867
+OFFSET_TIME_ORIGINAL = 36881
+GPS_LATITUDE_REF = 1
+GPS_LATITUDE = 2
+GPS_LONGITUDE_REF = 3
+GPS_LONGITUDE = 4
+
+
+def dms_to_degrees(dms, ref: str):
+    degrees = float(dms[0]) + float(dms[1]) / 60 + float(dms[2]) / 3600
+    return -degrees if ref in ("S", "W") else degrees
+
+
+def parse_timestamp(value: str, offset: str = None):
+    """EXIF "YYYY:MM:DD HH:MM:SS" to epoch seconds, as local time without an offset."""
+    if offset:
+        return int(datetime.strptime(value + offset, "%Y:%m:%d %H:%M:%S%z").timestamp())
+    return int(time.mktime(time.strptime(value, "%Y:%m:%d %H:%M:%S")))
+
+
+def read_exif(image_path: str):
+    """
+    GPS position and capture time of a photo, as payload fields:
+    {"location": {"lat", "lon"}, "taken_at": epoch seconds}. Fields the
+    photo does not carry are left out.
+    """
+    metadata = {}
+    try:
+        with Image.open(image_path) as image:
+            exif = image.getexif()
+        gps = exif.get_ifd(GPS_IFD)
+        if GPS_LATITUDE in gps and GPS_LONGITUDE in gps:
+            metadata["location"] = {
+                "lat": dms_to_degrees(gps[GPS_LATITUDE], gps.get(GPS_LATITUDE_REF, "N")),
+                "lon": dms_to_degrees(gps[GPS_LONGITUDE], gps.get(GPS_LONGITUDE_REF, "E")),
+            }
+        details = exif.get_ifd(EXIF_IFD)
+        taken = details.get(DATETIME_ORIGINAL) or exif.get(DATETIME)
+        if taken:
+            metadata["taken_at"] = parse_timestamp(
+                taken.strip("\x00 "), details.get(OFFSET_TIME_ORIGINAL)
+            )
+    except Exception as e:
+        error_message(f"Error reading EXIF from {image_path}: {e}")
+    return metadata
@@ -1,18 +1,29 @@
 from uuid import UUID
+import asyncio
+import random
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 from langchain_google_community import GoogleSearchAPIWrapper
 from langchain_core.tools import Tool
 
 from .config import settings
+from .embedding_cache import EmbeddingStore
+from .llm_cache import ShardedSQLiteCache
 
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain.globals import set_llm_cache
-from langchain_community.cache import SQLiteCache
 from langchain_core.callbacks import AsyncCallbackHandler, BaseCallbackHandler
 from langchain_core.outputs import LLMResult
 from typing import Any, Dict, List, Optional
 from typing_extensions import override
 
-langchain_cache = SQLiteCache(database_path=".langchain.db")
+langchain_cache = ShardedSQLiteCache(
+    path=settings.LLM_CACHE_PATH,
+    shards=settings.LLM_CACHE_SHARDS,
+    max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+    ttls=settings.LLM_CACHE_TTLS,
+)
 set_llm_cache(langchain_cache)
 
 import threading
@@ -56,9 +67,10 @@ class CostTrackerCallback(OpenAICallbackHandler):
     total_tokens: int = 0
     total_cost: float = 0
 
-    def __init__(self, model_name="gpt-4o") -> None:
+    def __init__(self, model_name="gpt-4o", totals: dict = openai_costs) -> None:
         super().__init__()
         self.model_name = model_name
+        self.totals = totals
         self.encoding = tiktoken.encoding_for_model(model_name)
         self._lock = threading.Lock()
 
@@ -94,13 +106,25 @@ class CostTrackerCallback(OpenAICallbackHandler):
         self.completion_cost = completion_cost
         self.total_tokens = self.prompt_tokens + self.completion_tokens
         self.total_cost = self.prompt_cost + self.completion_cost
+        if self.totals is None:
+            return
         with self._lock:
-            openai_costs["prompt_tokens"] += self.prompt_tokens
-            openai_costs["prompt_cost"] += self.prompt_cost
-            openai_costs["completion_tokens"] += self.completion_tokens
-            openai_costs["completion_cost"] += self.completion_cost
-            openai_costs["total_tokens"] += self.total_tokens
-            openai_costs["total_cost"] += self.total_cost
+            self.totals["prompt_tokens"] += self.prompt_tokens
+            self.totals["prompt_cost"] += self.prompt_cost
+            self.totals["completion_tokens"] += self.completion_tokens
+            self.totals["completion_cost"] += self.completion_cost
+            self.totals["total_tokens"] += self.total_tokens
+            self.totals["total_cost"] += self.total_cost
+
+    def usage(self) -> dict:
+        return {
+            "prompt_tokens": self.prompt_tokens,
+            "prompt_cost": self.prompt_cost,
+            "completion_tokens": self.completion_tokens,
+            "completion_cost": self.completion_cost,
+            "total_tokens": self.total_tokens,
+            "total_cost": self.total_cost,
+        }
 
 
 chatOpenAI = ChatOpenAI(
@@ -111,9 +135,203 @@ chatOpenAI = ChatOpenAI(
     api_key=settings.OPENAI_API_KEY,
     callbacks=[CostTrackerCallback("gpt-4o-mini")],
 )
+
+
+class EmbeddingBatcher:
+    """
+    Collects texts from concurrent callers and embeds them with one
+    embed_documents request per batch. A batch is sent once max_batch_size
+    texts are waiting or the oldest has waited max_wait seconds; up to
+    max_in_flight batches are sent concurrently and each caller gets back
+    only its own vectors. A failed batch is retried up to max_retries times
+    with jittered exponential backoff; if it still fails it is split in
+    halves until the failing text is isolated, so only its caller sees the
+    error. Lists at least
+    max_batch_size long go straight to the model.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        max_batch_size: int = 256,
+        max_wait: float = 0.005,
+        max_in_flight: int = 4,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+    ):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.retries = 0
+        self.bisections = 0
+        self.batches = 0
+        self.texts = 0
+        self.batch_sizes = Counter()
+        self._pending = []
+        self._oldest = None
+        self._condition = threading.Condition()
+        self._slots = threading.Semaphore(max_in_flight)
+        self._pool = ThreadPoolExecutor(max_in_flight, thread_name_prefix="embedding-batch")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future = Future()
+        with self._condition:
+            self._pending.append((text, future))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._condition.notify()
+        return future
+
+    def _take(self):
+        with self._condition:
+            while not self._pending or (
+                len(self._pending) < self.max_batch_size
+                and time.monotonic() - self._oldest < self.max_wait
+            ):
+                timeout = None
+                if self._oldest is not None:
+                    timeout = self.max_wait - (time.monotonic() - self._oldest)
+                self._condition.wait(timeout)
+            batch = self._pending[: self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size :]
+            self._oldest = time.monotonic() if self._pending else None
+            return batch
+
+    def _run(self):
+        while True:
+            # Wait for a free slot first, so texts keep coalescing meanwhile.
+            self._slots.acquire()
+            self._pool.submit(self._send, self._take())
+
+    def _embed(self, texts: list, attempts: int) -> list:
+        for attempt in range(attempts):
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception:
+                if attempt == attempts - 1:
+                    raise
+                with self._condition:
+                    self.retries += 1
+                time.sleep(random.uniform(0, self.backoff * 2**attempt))
+
+    def _resolve(self, batch, attempts: int = 1):
+        try:
+            vectors = self._embed([text for text, _ in batch], attempts)
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Split the batch in halves to isolate the input that fails.
+            with self._condition:
+                self.bisections += 1
+            middle = len(batch) // 2
+            self._resolve(batch[:middle])
+            self._resolve(batch[middle:])
+            return
+        with self._condition:
+            self.batches += 1
+            self.texts += len(batch)
+            self.batch_sizes[len(batch)] += 1
+        for (_, future), vector in zip(batch, vectors):
+            future.set_result(vector)
+
+    def _send(self, batch):
+        try:
+            self._resolve(batch, attempts=self.max_retries + 1)
+        finally:
+            self._slots.release()
+
+    def embed_query(self, text: str) -> list:
+        return self.submit(text).result()
+
+    async def aembed_query(self, text: str) -> list:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def embed_documents(self, texts: list) -> list:
+        if len(texts) >= self.max_batch_size:
+            return self.embeddings.embed_documents(texts)
+        return [future.result() for future in [self.submit(text) for text in texts]]
+
+    async def aembed_documents(self, texts: list) -> list:
+        if len(texts) >= self.max_batch_size:
+            return await self.embeddings.aembed_documents(texts)
+        return list(
+            await asyncio.gather(
+                *[asyncio.wrap_future(self.submit(text)) for text in texts]
+            )
+        )
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch_size": self.texts / self.batches if self.batches else 0,
+            "max_batch_size": max(self.batch_sizes, default=0),
+            "retries": self.retries,
+            "bisections": self.bisections,
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
+
+
 openAIEmbeddings = OpenAIEmbeddings(
     model="text-embedding-3-large", api_key=settings.OPENAI_API_KEY
 )
+_batchers = {
+    ("text-embedding-3-large", 3072): EmbeddingBatcher(
+        openAIEmbeddings,
+        max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+        max_wait=settings.EMBEDDING_BATCH_MAX_WAIT,
+        max_in_flight=settings.EMBEDDING_BATCH_MAX_IN_FLIGHT,
+        max_retries=settings.EMBEDDING_BATCH_MAX_RETRIES,
+    )
+}
+_embeddings = {}
+_query_embeddings = {}
+
+
+def get_batcher(model: str, dimensions: int) -> EmbeddingBatcher:
+    if (model, dimensions) not in _batchers:
+        _batchers[(model, dimensions)] = EmbeddingBatcher(
+            OpenAIEmbeddings(
+                model=model, dimensions=dimensions, api_key=settings.OPENAI_API_KEY
+            ),
+            max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+            max_wait=settings.EMBEDDING_BATCH_MAX_WAIT,
+            max_in_flight=settings.EMBEDDING_BATCH_MAX_IN_FLIGHT,
+            max_retries=settings.EMBEDDING_BATCH_MAX_RETRIES,
+        )
+    return _batchers[(model, dimensions)]
+
+
+def embedding_store(model: str, dimensions: int, normalize: bool) -> EmbeddingStore:
+    return EmbeddingStore(
+        get_batcher(model, dimensions),
+        model=model,
+        dimensions=dimensions,
+        max_size=settings.EMBEDDING_CACHE_SIZE,
+        path=settings.EMBEDDING_CACHE_PATH or None,
+        dtype=settings.EMBEDDING_STORE_DTYPE,
+        normalize=normalize,
+    )
+
+
+def get_embeddings(model: str, dimensions: int) -> EmbeddingStore:
+    """Document embeddings: texts are embedded exactly as given."""
+    if (model, dimensions) not in _embeddings:
+        _embeddings[(model, dimensions)] = embedding_store(model, dimensions, False)
+    return _embeddings[(model, dimensions)]
+
+
+def get_query_embeddings(model: str, dimensions: int) -> EmbeddingStore:
+    """Query embeddings: texts are normalized first so variants share an entry."""
+    if (model, dimensions) not in _query_embeddings:
+        _query_embeddings[(model, dimensions)] = embedding_store(model, dimensions, True)
+    return _query_embeddings[(model, dimensions)]
+
 
 search = GoogleSearchAPIWrapper(
     google_api_key=settings.GOOGLE_API_KEY,
@@ -3,6 +3,9 @@ from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
 from langchain_core.runnables import RunnableLambda
 from .utils import image_to_base64
 from .langchain_init import chatOpenAI
+from .config import settings
+from .llm_cache import TemplateScope
+from .semantic_cache import with_semantic_cache
 
 
 DefaultPrompt = PromptTemplate.from_template("{text}") | chatOpenAI
@@ -274,9 +277,27 @@ Output format:
 
 JokePrompt = PromptTemplate.from_template("Tell me a joke about {text}") | chatOpenAI
 
+# Tag each chain with its template so its LLM calls get that template's cache TTL.
+DefaultPrompt = TemplateScope("default", DefaultPrompt)
+VlogGenerationPrompt = TemplateScope("vlog", VlogGenerationPrompt)
+MusicGenerationPrompt = TemplateScope("music", MusicGenerationPrompt)
+BlogGenerationPrompt = TemplateScope("blog", BlogGenerationPrompt)
+TripPlanPrompt = TemplateScope("trip_plan", TripPlanPrompt)
+ImageToTextPrompt = TemplateScope("image_to_text", ImageToTextPrompt)
+JokePrompt = TemplateScope("joke", JokePrompt)
 
 prompts = {
     "default": DefaultPrompt,
     "image_to_text": ImageToTextPrompt,
     "joke": JokePrompt,
 }
+
+if settings.SEMANTIC_CACHE:
+    prompts = with_semantic_cache(
+        prompts,
+        thresholds=settings.SEMANTIC_CACHE_THRESHOLDS,
+        max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+        ttls=settings.LLM_CACHE_TTLS,
+        verify_rate=settings.SEMANTIC_CACHE_VERIFY_RATE,
+    )
+    DefaultPrompt = prompts["default"]
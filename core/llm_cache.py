@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.runnables import Runnable
+
+# Prompt template of the LLM call being made, used to pick its cache TTL.
+cache_template: ContextVar[str] = ContextVar("cache_template", default="default")
+
+# Seconds a response stays valid per template; None never expires.
+TEMPLATE_TTLS = {
+    "default": 7 * 24 * 3600,
+    "joke": 3600,
+    "image_to_text": None,
+    "trip_plan": 6 * 3600,
+    "blog": 24 * 3600,
+    "vlog": 24 * 3600,
+    "music": 24 * 3600,
+}
+
+
+@contextmanager
+def llm_cache_template(name: str):
+    token = cache_template.set(name)
+    try:
+        yield
+    finally:
+        cache_template.reset(token)
+
+
+class TemplateScope(Runnable):
+    """Runs a chain with cache_template set, so its LLM calls get that template's TTL."""
+
+    def __init__(self, name: str, runnable: Runnable):
+        self.name = name
+        self.runnable = runnable
+
+    @property
+    def InputType(self):
+        return self.runnable.InputType
+
+    @property
+    def OutputType(self):
+        return self.runnable.OutputType
+
+    def invoke(self, input, config=None, **kwargs):
+        with llm_cache_template(self.name):
+            return self.runnable.invoke(input, config, **kwargs)
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        with llm_cache_template(self.name):
+            return await self.runnable.ainvoke(input, config, **kwargs)
+
+    def stream(self, input, config=None, **kwargs):
+        with llm_cache_template(self.name):
+            yield from self.runnable.stream(input, config, **kwargs)
+
+    async def astream(self, input, config=None, **kwargs):
+        with llm_cache_template(self.name):
+            async for chunk in self.runnable.astream(input, config, **kwargs):
+                yield chunk
+
+
+class ShardedSQLiteCache(BaseCache):
+    """
+    LLM response cache spread over `shards` SQLite files in WAL mode, so
+    concurrent writers (threads or uvicorn workers) rarely wait on the same
+    file. Entries expire after the TTL of the template they were written
+    under and, past max_entries, the least recently used are evicted. A hit
+    only rewrites accessed_at when it is older than touch_interval seconds,
+    so most lookups stay read-only.
+    """
+
+    def __init__(
+        self,
+        path: str = ".llm_cache",
+        shards: int = 8,
+        max_entries: int = 100_000,
+        ttls: dict = None,
+        evict_every: int = 100,
+        touch_interval: int = 300,
+    ):
+        self.path = path
+        self.touch_interval = touch_interval
+        self.max_entries = max_entries
+        self.ttls = {**TEMPLATE_TTLS, **(ttls or {})}
+        self.evict_every = evict_every
+        self.hits = Counter()
+        self.misses = Counter()
+        self.expired = 0
+        self.evictions = 0
+        os.makedirs(path, exist_ok=True)
+        self._shards = [self._connect(i) for i in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._writes = [0] * shards
+
+    def _connect(self, shard: int):
+        db = sqlite3.connect(
+            os.path.join(self.path, f"shard-{shard:02d}.db"),
+            timeout=5,
+            check_same_thread=False,
+        )
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key BLOB PRIMARY KEY, template TEXT,"
+            " response TEXT, expires_at REAL, accessed_at REAL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+        db.commit()
+        return db
+
+    def _locate(self, prompt: str, llm_string: str):
+        key = hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).digest()
+        return key, key[0] % len(self._shards)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        template = cache_template.get()
+        key, shard = self._locate(prompt, llm_string)
+        now = time.time()
+        with self._locks[shard]:
+            db = self._shards[shard]
+            row = db.execute(
+                "SELECT response, expires_at, accessed_at FROM cache WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is not None and row[1] is not None and row[1] < now:
+                db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                db.commit()
+                self.expired += 1
+                row = None
+            if row is None:
+                self.misses[template] += 1
+                return None
+            if row[2] < now - self.touch_interval:
+                db.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+                db.commit()
+        self.hits[template] += 1
+        return [loads(generation) for generation in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        template = cache_template.get()
+        ttl = self.ttls.get(template, self.ttls["default"])
+        key, shard = self._locate(prompt, llm_string)
+        now = time.time()
+        response = json.dumps([dumps(generation) for generation in return_val])
+        with self._locks[shard]:
+            db = self._shards[shard]
+            db.execute(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)",
+                (key, template, response, None if ttl is None else now + ttl, now),
+            )
+            db.commit()
+            self._writes[shard] += 1
+            if self._writes[shard] % self.evict_every == 0:
+                self._evict(shard, now)
+
+    def _evict(self, shard: int, now: float):
+        db = self._shards[shard]
+        db.execute("DELETE FROM cache WHERE expires_at < ?", (now,))
+        limit = self.max_entries // len(self._shards)
+        excess = db.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - limit
+        if excess > 0:
+            db.execute(
+                "DELETE FROM cache WHERE key IN"
+                " (SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+            self.evictions += excess
+        db.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        for lock, db in zip(self._locks, self._shards):
+            with lock:
+                db.execute("DELETE FROM cache")
+                db.commit()
+
+    def stats(self) -> dict:
+        hits, misses = sum(self.hits.values()), sum(self.misses.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "templates": {
+                template: {
+                    "hits": self.hits[template],
+                    "misses": self.misses[template],
+                }
+                for template in sorted(set(self.hits) | set(self.misses))
+            },
+        }
@@ -1,4 +1,5 @@
 import os
+import inspect
 import json
 import time
 from langchain_community.callbacks import get_openai_callback
@@ -53,30 +54,36 @@ def withcosts(reason):
     return decorator
 
 
-def logging(func):
-    def wrapper(*args, **kwargs):
-        input_data = str((args, kwargs))
-        input_size = len(input_data)
+def record_call(func, args, kwargs, result, elapsed_time):
+    input_size = len(str((args, kwargs)))
+    output_size = len(str(result))
+    logs.append(
+        {
+            "function": func.__name__,
+            "input_size": input_size,
+            "output_size": output_size,
+            "total_size": input_size + output_size,
+            "elapsed_time": elapsed_time,
+        }
+    )
 
-        start_time = time.time()
-        result = func(*args, **kwargs)
-        end_time = time.time()
 
-        output_data = str(result)
-        output_size = len(output_data)
+def logging(func):
+    if inspect.iscoroutinefunction(func):
 
-        total_bandwidth = input_size + output_size
-        elapsed_time = end_time - start_time
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start_time = time.time()
+            result = await func(*args, **kwargs)
+            record_call(func, args, kwargs, result, time.time() - start_time)
+            return result
 
-        logs.append(
-            {
-                "function": func.__name__,
-                "input_size": input_size,
-                "output_size": output_size,
-                "total_size": total_bandwidth,
-                "elapsed_time": elapsed_time,
-            }
-        )
+        return async_wrapper
+
+    def wrapper(*args, **kwargs):
+        start_time = time.time()
+        result = func(*args, **kwargs)
+        record_call(func, args, kwargs, result, time.time() - start_time)
         return result
 
     return wrapper
@@ -0,0 +1,307 @@
+import random
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import Runnable, RunnableSequence
+
+from .collection_config import CollectionConfig
+from .langchain_init import get_query_embeddings
+from .llm_cache import TEMPLATE_TTLS, TemplateScope, llm_cache_template
+from .debug import *
+
+# Minimum cosine similarity between rendered prompts for a cached answer to
+# be reused. Templates without an entry are never semantically cached.
+SEMANTIC_THRESHOLDS = {
+    "default": 0.95,
+    "joke": 0.92,
+}
+
+SEMANTIC_CACHE_CONFIG = CollectionConfig(model="text-embedding-3-large", dimensions=256)
+
+
+def split_chain(runnable: Runnable):
+    """(prompt rendering part, model) of a `prompt | model` chain."""
+    name = None
+    if isinstance(runnable, TemplateScope):
+        name, runnable = runnable.name, runnable.runnable
+    steps = runnable.steps
+    render = steps[0] if len(steps) == 2 else RunnableSequence(*steps[:-1])
+    return name, render, steps[-1]
+
+
+class SemanticStore:
+    """
+    Bounded in-memory store of (prompt vector, response) pairs, one per
+    template and process. Entries expire after `ttl` seconds and, once
+    max_entries are live, the least recently used is replaced.
+    """
+
+    def __init__(self, dimensions: int, max_entries: int = 10000, ttl: int = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.vectors = np.zeros((max_entries, dimensions), dtype=np.float32)
+        self.responses = [None] * max_entries
+        self.ids = np.zeros(max_entries, dtype=np.int64)
+        self.live = np.zeros(max_entries, dtype=bool)
+        self.expires_at = np.full(max_entries, np.inf)
+        self.accessed_at = np.zeros(max_entries)
+        self.expired = 0
+        self.evictions = 0
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return int(self.live.sum())
+
+    def search(self, vector: list, threshold: float):
+        """(id, score, response) of the most similar live entry at or above threshold."""
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        now = time.time()
+        with self._lock:
+            stale = self.live & (self.expires_at < now)
+            self.expired += int(stale.sum())
+            self.live &= ~stale
+            if not self.live.any():
+                return None
+            scores = self.vectors @ query
+            scores[~self.live] = -np.inf
+            row = int(np.argmax(scores))
+            if scores[row] < threshold:
+                return None
+            self.accessed_at[row] = now
+            return int(self.ids[row]), float(scores[row]), self.responses[row]
+
+    def add(self, vector: list, response: str):
+        vector = np.asarray(vector, dtype=np.float32)
+        now = time.time()
+        with self._lock:
+            free = np.flatnonzero(~self.live)
+            if len(free):
+                row = int(free[0])
+            else:
+                row = int(np.argmin(self.accessed_at))
+                self.evictions += 1
+            self.vectors[row] = vector / (np.linalg.norm(vector) or 1.0)
+            self.responses[row] = response
+            self.ids[row] = self._next_id
+            self._next_id += 1
+            self.live[row] = True
+            self.expires_at[row] = np.inf if self.ttl is None else now + self.ttl
+            self.accessed_at[row] = now
+
+    def remove(self, id: int):
+        with self._lock:
+            self.live &= self.ids != id
+
+
+class SemanticCache(Runnable):
+    """
+    Reuses the answer to an earlier prompt of the same template when the
+    rendered prompts are at least `threshold` similar.
+
+    Entries live in a per-process SemanticStore, so each uvicorn worker
+    warms its own cache. A sampled `verify_rate` of hits is also sent to the model; when the
+    fresh answer is less than `verify_threshold` similar to the cached one
+    the hit is counted as false and the fresh answer replaces the cached one.
+    Embedding or store errors count as misses and the call goes to the model.
+    """
+
+    def __init__(
+        self,
+        runnable: Runnable,
+        threshold: float,
+        name: str = None,
+        max_entries: int = 10000,
+        ttl: int = None,
+        verify_rate: float = 0.05,
+        verify_threshold: float = 0.85,
+    ):
+        scope, self.render, self.llm = split_chain(runnable)
+        self.name = name or scope or "default"
+        self.threshold = threshold
+        self.store = SemanticStore(SEMANTIC_CACHE_CONFIG.dimensions, max_entries, ttl)
+        self.verify_rate = verify_rate
+        self.verify_threshold = verify_threshold
+        self.embeddings = get_query_embeddings(
+            SEMANTIC_CACHE_CONFIG.model, SEMANTIC_CACHE_CONFIG.dimensions
+        )
+        self.counts = Counter()
+        self.scores = []
+        self._lock = threading.Lock()
+
+    def _count(self, event: str, score: float = None):
+        with self._lock:
+            self.counts[event] += 1
+            if score is not None:
+                self.scores = (self.scores + [score])[-1000:]
+
+    def _failed(self, step: str, e: Exception):
+        """The cache is optional: count the error and let the call go to the model."""
+        self._count("errors")
+        warning_message(f"Semantic cache {step} failed for {self.name}: {e}")
+
+    def _match(self, vector: list):
+        hit = self.store.search(vector, self.threshold)
+        if hit is None:
+            self._count("misses")
+            return vector, None, None
+        id, score, response = hit
+        self._count("hits", score)
+        return vector, loads(response), id
+
+    def _lookup(self, text: str):
+        """(prompt vector, cached response, entry id); all None if the lookup fails."""
+        try:
+            return self._match(self.embeddings.embed_query(text))
+        except Exception as e:
+            self._failed("lookup", e)
+            self._count("misses")
+            return None, None, None
+
+    async def _alookup(self, text: str):
+        try:
+            return self._match(await self.embeddings.aembed_query(text))
+        except Exception as e:
+            self._failed("lookup", e)
+            self._count("misses")
+            return None, None, None
+
+    def _store(self, vector: list, response):
+        if vector is None:
+            return
+        try:
+            self.store.add(vector, dumps(response))
+        except Exception as e:
+            self._failed("store", e)
+
+    def _agrees(self, cached, fresh, id):
+        try:
+            a, b = self.embeddings.embed_documents([cached.content, fresh.content])
+        except Exception as e:
+            self._failed("verification", e)
+            return False
+        similarity = float(np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b)))
+        if similarity < self.verify_threshold:
+            self._count("false_hits")
+            warning_message(
+                f"Semantic cache false hit for {self.name} (answers {similarity:.2f} similar)"
+            )
+            self.store.remove(id)
+            return False
+        return True
+
+    def invoke(self, input, config=None, **kwargs):
+        with llm_cache_template(self.name):
+            prompt = self.render.invoke(input, config)
+            vector, cached, id = self._lookup(prompt.to_string())
+            if cached is not None and random.random() >= self.verify_rate:
+                return cached
+            response = self.llm.invoke(prompt, config, **kwargs)
+            if cached is not None:
+                self._count("verified")
+                if self._agrees(cached, response, id):
+                    return cached
+            self._store(vector, response)
+            return response
+
+    async def ainvoke(self, input, config=None, **kwargs):
+        with llm_cache_template(self.name):
+            prompt = await self.render.ainvoke(input, config)
+            vector, cached, id = await self._alookup(prompt.to_string())
+            if cached is not None and random.random() >= self.verify_rate:
+                return cached
+            response = await self.llm.ainvoke(prompt, config, **kwargs)
+            if cached is not None:
+                self._count("verified")
+                if self._agrees(cached, response, id):
+                    return cached
+            self._store(vector, response)
+            return response
+
+    def _finish(self, vector: list, cached, id, response):
+        """Store a streamed answer, unless it confirms a sampled cached one."""
+        response = AIMessage(content=response.content)
+        if cached is not None:
+            self._count("verified")
+            if self._agrees(cached, response, id):
+                return
+        self._store(vector, response)
+
+    def stream(self, input, config=None, **kwargs):
+        with llm_cache_template(self.name):
+            prompt = self.render.invoke(input, config)
+            vector, cached, id = self._lookup(prompt.to_string())
+            if cached is not None and random.random() >= self.verify_rate:
+                yield AIMessageChunk(content=cached.content)
+                return
+            response = None
+            for chunk in self.llm.stream(prompt, config, **kwargs):
+                response = chunk if response is None else response + chunk
+                yield chunk
+            if response is not None:
+                self._finish(vector, cached, id, response)
+
+    async def astream(self, input, config=None, **kwargs):
+        with llm_cache_template(self.name):
+            prompt = await self.render.ainvoke(input, config)
+            vector, cached, id = await self._alookup(prompt.to_string())
+            if cached is not None and random.random() >= self.verify_rate:
+                yield AIMessageChunk(content=cached.content)
+                return
+            response = None
+            async for chunk in self.llm.astream(prompt, config, **kwargs):
+                response = chunk if response is None else response + chunk
+                yield chunk
+            if response is not None:
+                self._finish(vector, cached, id, response)
+
+    def stats(self) -> dict:
+        hits, misses = self.counts["hits"], self.counts["misses"]
+        verified = self.counts["verified"]
+        return {
+            "threshold": self.threshold,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0,
+            "verified": verified,
+            "false_hits": self.counts["false_hits"],
+            "false_hit_rate": self.counts["false_hits"] / verified if verified else 0,
+            "errors": self.counts["errors"],
+            "median_hit_score": float(np.median(self.scores)) if self.scores else None,
+            "entries": len(self.store),
+            "expired": self.store.expired,
+            "evictions": self.store.evictions,
+        }
+
+
+def with_semantic_cache(
+    prompts: dict,
+    thresholds: dict = None,
+    max_entries: int = 10000,
+    ttls: dict = None,
+    verify_rate: float = 0.05,
+):
+    """
+    Wrap the templates that have a threshold in a SemanticCache. Entries
+    expire after the template's TTL, as in the exact-match LLM cache.
+    """
+    thresholds = {**SEMANTIC_THRESHOLDS, **(thresholds or {})}
+    ttls = {**TEMPLATE_TTLS, **(ttls or {})}
+    return {
+        name: SemanticCache(
+            chain,
+            thresholds[name],
+            name=name,
+            max_entries=max_entries,
+            ttl=ttls.get(name, ttls["default"]),
+            verify_rate=verify_rate,
+        )
+        if name in thresholds
+        else chain
+        for name, chain in prompts.items()
+    }
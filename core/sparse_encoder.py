@@ -0,0 +1,47 @@
+import re
+import zlib
+from collections import Counter
+from qdrant_client import models
+
+# BM25 term-frequency saturation. IDF is applied by Qdrant at query time
+# (Modifier.IDF on the sparse vector), so documents only carry the TF part.
+K1 = 1.2
+B = 0.75
+AVG_DOC_LENGTH = 64
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has",
+    "in", "is", "it", "its", "of", "on", "or", "that", "the", "this", "to",
+    "was", "were", "with",
+}
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str):
+    return [
+        token
+        for token in TOKEN_PATTERN.findall(text.casefold())
+        if token not in STOPWORDS
+    ]
+
+
+def token_index(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def bm25_document_vector(text: str) -> models.SparseVector:
+    tokens = tokenize(text)
+    length_norm = K1 * (1 - B + B * len(tokens) / AVG_DOC_LENGTH)
+    weights = {}
+    for token, tf in Counter(tokens).items():
+        index = token_index(token)
+        weights[index] = weights.get(index, 0) + tf * (K1 + 1) / (tf + length_norm)
+    return models.SparseVector(
+        indices=list(weights), values=list(weights.values())
+    )
+
+
+def bm25_query_vector(text: str) -> models.SparseVector:
+    indices = sorted({token_index(token) for token in tokenize(text)})
+    return models.SparseVector(indices=indices, values=[1.0] * len(indices))
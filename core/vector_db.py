@@ -2,14 +2,31 @@ from typing_extensions import override
 from abc import ABC, abstractmethod
 from dotenv import load_dotenv
 from qdrant_client.http.models import Filter, Range
-from qdrant_client import QdrantClient, models
-from qdrant_client.http.models import VectorParams, Distance
+from qdrant_client import QdrantClient, AsyncQdrantClient, models
 import os
+import grpc
+import httpx
 from rich.progress import Progress
 from rich import print
+from array import array
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import atexit
+import hashlib
+import json
+import random
+import shutil
+import threading
 import time
+import uuid
 
-from .langchain_init import openAIEmbeddings
+from .langchain_init import get_query_embeddings
+from .sparse_encoder import bm25_query_vector
+from .write_behind import WriteBehindBuffer, AsyncWriteBehindBuffer
+from .collection_config import (
+    CollectionConfig,
+    get_collection_config,
+)
 from .debug import *
 from .logs import logs, logging
 from .config import settings
@@ -17,6 +34,428 @@ from .config import settings
 load_dotenv()
 
 
+# user_id only needs exact matches; CollectionConfig.payload_m builds
+# per-user HNSW links so filtered searches stay inside one tenant's graph.
+# url is matched exactly to group photo search results, location holds the
+# EXIF geo point for radius / bounding-box filters, and created_at is the
+# principal range key used by get_range.
+PAYLOAD_INDEXES = {
+    "user_id": models.IntegerIndexParams(
+        type=models.IntegerIndexType.INTEGER, lookup=True, range=False
+    ),
+    "url": models.KeywordIndexParams(type=models.KeywordIndexType.KEYWORD),
+    "location": models.GeoIndexParams(type=models.GeoIndexType.GEO),
+    "created_at": models.IntegerIndexParams(
+        type=models.IntegerIndexType.INTEGER,
+        lookup=False,
+        range=True,
+        is_principal=True,
+    ),
+}
+
+
+def qdrant_client_options(
+    prefer_grpc: bool = False,
+    grpc_port: int = 6334,
+    compression: str = "",
+    timeout: int = 60,
+    pool_size: int = None,
+    keepalive_connections: int = None,
+    max_message_mb: int = 64,
+):
+    """
+    Transport keyword arguments for QdrantClient/AsyncQdrantClient. gRPC
+    sends vectors as packed floats instead of JSON number lists, which is
+    where most of the time goes for 3072-dimension payloads; gzip trades
+    CPU for bandwidth on slow links. Pool limits apply to REST.
+    """
+    options = dict(prefer_grpc=prefer_grpc, grpc_port=grpc_port, timeout=timeout)
+    if prefer_grpc:
+        max_message = max_message_mb * 2**20
+        options["grpc_options"] = {
+            "grpc.max_send_message_length": max_message,
+            "grpc.max_receive_message_length": max_message,
+            "grpc.keepalive_time_ms": 30000,
+        }
+        if compression == "gzip":
+            options["grpc_compression"] = grpc.Compression.Gzip
+    elif pool_size is not None:
+        options["limits"] = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=keepalive_connections,
+        )
+    return options
+
+
+def make_point_id(embedding, payload: dict):
+    """
+    Content-derived point id: the same vector and payload always map to the
+    same UUID, so ids need no round trip and retried writes are idempotent.
+    """
+    digest = hashlib.sha256(
+        json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    )
+    vectors = embedding if isinstance(embedding, dict) else {"": embedding}
+    for name in sorted(vectors):
+        vector = vectors[name]
+        digest.update(name.encode("utf-8"))
+        if isinstance(vector, models.SparseVector):
+            digest.update(array("q", vector.indices).tobytes())
+            vector = vector.values
+        digest.update(array("d", vector).tobytes())
+    return str(uuid.UUID(bytes=digest.digest()[:16], version=5))
+
+
+def backoff_delay(attempt: int, base=0.5, cap=30.0):
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+def retry_with_backoff(func, max_retries=8, description="request"):
+    for attempt in range(max_retries):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == max_retries - 1:
+                raise
+            delay = backoff_delay(attempt)
+            error_message(f"Error in {description}: {e}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def load_checkpoint(checkpoint_path: str = None):
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as f:
+            return set(json.load(f)["done"])
+    return set()
+
+
+def save_checkpoint(checkpoint_path: str, done: set):
+    if not checkpoint_path:
+        return
+    with open(checkpoint_path + ".tmp", "w") as f:
+        json.dump({"done": sorted(done)}, f)
+    os.replace(checkpoint_path + ".tmp", checkpoint_path)
+
+
+def build_vectors(embedding):
+    if isinstance(embedding, dict):
+        return embedding
+    return {"content": embedding}
+
+
+def build_points(embeddings: list, payloads: list, ids=None):
+    if ids is None:
+        ids = [
+            make_point_id(embedding, payload)
+            for embedding, payload in zip(embeddings, payloads)
+        ]
+    return [
+        models.PointStruct(id=id, vector=build_vectors(embedding), payload=payload)
+        for id, embedding, payload in zip(ids, embeddings, payloads)
+    ]
+
+
+def build_query(
+    embedding,
+    using="content",
+    limit=50,
+    filter=None,
+    score_threshold=None,
+    fusion="rrf",
+    search_params=None,
+    sparse_query=None,
+    sparse_using=None,
+):
+    """
+    Keyword arguments for query_points. Several vector names, or a sparse
+    query next to the dense one, run one prefetch each and fuse the
+    candidates server-side. Fused scores are rank based, so score_threshold
+    applies to each dense prefetch; sparse (keyword) matches are kept
+    regardless of their dense similarity.
+    """
+    query_filter = build_filter(filter)
+    if isinstance(using, str) and sparse_query is None:
+        return dict(
+            query=embedding,
+            using=using,
+            limit=limit,
+            query_filter=query_filter,
+            score_threshold=score_threshold,
+            search_params=search_params,
+            with_payload=True,
+        )
+    names = [using] if isinstance(using, str) else using
+    prefetch = [
+        models.Prefetch(
+            query=embedding,
+            using=name,
+            filter=query_filter,
+            params=search_params,
+            limit=limit,
+            score_threshold=score_threshold,
+        )
+        for name in names
+    ]
+    if sparse_query is not None:
+        prefetch.append(
+            models.Prefetch(
+                query=sparse_query,
+                using=sparse_using,
+                filter=query_filter,
+                limit=limit,
+            )
+        )
+    return dict(
+        prefetch=prefetch,
+        query=models.FusionQuery(fusion=models.Fusion(fusion)),
+        limit=limit,
+        query_filter=query_filter,
+        with_payload=True,
+    )
+
+
+def query_request(query: dict):
+    """build_query arguments as one entry of a query_batch_points call."""
+    query = dict(query)
+    query["filter"] = query.pop("query_filter")
+    if "search_params" in query:
+        query["params"] = query.pop("search_params")
+    return models.QueryRequest(offset=0, **query)
+
+
+def search_request(
+    config: CollectionConfig,
+    query: str,
+    embedding,
+    using="content",
+    limit=50,
+    filter=None,
+    score_threshold=None,
+    fusion="rrf",
+    hybrid=False,
+    profile=None,
+    hnsw_ef=None,
+    exact=None,
+):
+    """build_query arguments for a text query, embedded with config's model."""
+    return build_query(
+        embedding,
+        using=using,
+        limit=limit,
+        filter=filter,
+        score_threshold=score_threshold,
+        fusion=fusion,
+        search_params=config.search_params(profile, hnsw_ef=hnsw_ef, exact=exact),
+        sparse_query=bm25_query_vector(query)
+        if hybrid and config.sparse_vector
+        else None,
+        sparse_using=config.sparse_vector,
+    )
+
+
+def search_batch_requests(
+    config: CollectionConfig,
+    queries: list,
+    vectors: list,
+    filters: list,
+    limits: list,
+    **options,
+):
+    return [
+        query_request(
+            search_request(
+                config, text, vector, limit=query_limit, filter=query_filter, **options
+            )
+        )
+        for text, vector, query_filter, query_limit in zip(
+            queries, vectors, filters, limits
+        )
+    ]
+
+
+def recommend_request(
+    config: CollectionConfig,
+    positive: list,
+    negative: list = None,
+    using="content",
+    limit=50,
+    filter=None,
+    score_threshold=None,
+    fusion="rrf",
+    profile=None,
+):
+    """build_query arguments for a recommendation from stored example points."""
+    query = models.RecommendQuery(
+        recommend=models.RecommendInput(positive=positive, negative=negative or None)
+    )
+    return build_query(
+        query,
+        using=using,
+        limit=limit,
+        filter=filter,
+        score_threshold=score_threshold,
+        fusion=fusion,
+        search_params=config.search_params(profile),
+    )
+
+
+def group_hits(response):
+    """Best hit of each group of a query_points_groups response, in ranked order."""
+    return [group.hits[0] for group in response.groups]
+
+
+def collection_params(config: CollectionConfig):
+    return dict(
+        vectors_config=config.vectors_config(),
+        sparse_vectors_config=config.sparse_vectors_config(),
+        quantization_config=config.quantization_config(),
+        hnsw_config=config.hnsw_config(),
+    )
+
+
+def collection_update_params(config: CollectionConfig):
+    return dict(
+        vectors_config={
+            name: models.VectorParamsDiff(on_disk=config.on_disk)
+            for name in config.vector_names
+        },
+        quantization_config=config.quantization_config() or models.Disabled.DISABLED,
+        hnsw_config=config.hnsw_config(),
+    )
+
+
+def build_condition(key: str, value):
+    """Equality, or a geo radius / bounding box on a geo payload field."""
+    if isinstance(value, models.GeoRadius):
+        return models.FieldCondition(key=key, geo_radius=value)
+    if isinstance(value, models.GeoBoundingBox):
+        return models.FieldCondition(key=key, geo_bounding_box=value)
+    return models.FieldCondition(
+        key=key,
+        match=models.MatchValue(
+            value=value,
+        ),
+    )
+
+
+def build_filter(filter: dict = None):
+    if filter is None:
+        return None
+    must = []
+    for key, value in filter.items():
+        must.append(build_condition(key, value))
+    return models.Filter(must=must)
+
+
+def geo_radius(lat: float, lon: float, radius_km: float):
+    return models.GeoRadius(
+        center=models.GeoPoint(lat=lat, lon=lon), radius=radius_km * 1000
+    )
+
+
+def geo_bounding_box(top: float, left: float, bottom: float, right: float):
+    return models.GeoBoundingBox(
+        top_left=models.GeoPoint(lat=top, lon=left),
+        bottom_right=models.GeoPoint(lat=bottom, lon=right),
+    )
+
+
+def geo_matches(geo, location: dict):
+    """Client-side check of a GeoRadius or GeoBoundingBox, for NumpyDB."""
+    if location is None:
+        return False
+    lat, lon = location["lat"], location["lon"]
+    if isinstance(geo, models.GeoRadius):
+        lat1, lon1, lat2, lon2 = map(
+            np.radians, (geo.center.lat, geo.center.lon, lat, lon)
+        )
+        h = (
+            np.sin((lat2 - lat1) / 2) ** 2
+            + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+        )
+        return 2 * 6371008.8 * np.arcsin(np.sqrt(h)) <= geo.radius
+    left, right = geo.top_left.lon, geo.bottom_right.lon
+    in_lon = left <= lon <= right if left <= right else lon >= left or lon <= right
+    return geo.bottom_right.lat <= lat <= geo.top_left.lat and in_lon
+
+
+def build_range_filter(l, r, user_id, geo: dict = None):
+    """created_at in [l, r] for user_id, plus optional geo conditions ({field: GeoRadius})."""
+    return Filter(
+        must=[
+            models.FieldCondition(
+                key="created_at",
+                range=models.Range(
+                    gt=None,
+                    gte=l,
+                    lt=None,
+                    lte=r,
+                ),
+            ),
+            models.FieldCondition(
+                key="user_id",
+                match=models.MatchValue(
+                    value=user_id,
+                ),
+            ),
+        ]
+        + [build_condition(key, value) for key, value in (geo or {}).items()]
+    )
+
+
+class RangeScroll:
+    """
+    Paging state of iter_range: every point of user_id created in [l, r],
+    oldest first, optionally restricted by geo conditions.
+
+    Pages are ordered server-side by created_at. Scrolling with order_by
+    has no offset, so each page restarts at the last created_at seen and
+    skips the ids already yielded for that value.
+    """
+
+    def __init__(
+        self, l, r, user_id, collection_name: str, page_size=64, fields=None, geo=None
+    ):
+        self.collection_name = collection_name
+        self.scroll_filter = build_range_filter(l, r, user_id, geo)
+        self.with_payload = (
+            True if fields is None else list(set(fields) | {"created_at"})
+        )
+        self.page_size = page_size
+        self.start_from = None
+        self.seen = set()
+        self.limit = page_size
+        self.done = False
+
+    def request(self):
+        self.limit = self.page_size + len(self.seen)
+        return dict(
+            collection_name=self.collection_name,
+            scroll_filter=self.scroll_filter,
+            limit=self.limit,
+            order_by=models.OrderBy(
+                key="created_at",
+                direction=models.Direction.ASC,
+                start_from=self.start_from,
+            ),
+            with_payload=self.with_payload,
+        )
+
+    def page(self, points: list):
+        """The points of a scrolled page not yielded yet."""
+        new = [point for point in points if point.id not in self.seen]
+        if len(points) < self.limit:
+            self.done = True
+            return new
+        last = points[-1].payload["created_at"]
+        if last != self.start_from:
+            self.seen = set()
+        self.start_from = last
+        self.seen |= {p.id for p in points if p.payload["created_at"] == last}
+        return new
+
+
 class VectorDB(ABC):
     def __init__(self):
         pass
@@ -117,35 +556,104 @@ class VectorDBwithCollection:
 
 
 class QdrantDB(VectorDB):
-    def __init__(self, host: str, api_key: str):
+    def __init__(
+        self,
+        host: str,
+        api_key: str,
+        write_behind: bool = False,
+        write_behind_max_points: int = 64,
+        write_behind_max_delay: float = 0.05,
+        client_options: dict = None,
+        search_timeout: int = None,
+    ):
         super().__init__()
-        self.client = QdrantClient(host, api_key=api_key, timeout=60)
+        self.client = QdrantClient(
+            host, api_key=api_key, **(client_options or {"timeout": 60})
+        )
+        self.search_timeout = search_timeout
+        self.write_buffer = None
+        if write_behind:
+            self.write_buffer = WriteBehindBuffer(
+                self._upsert_points,
+                max_points=write_behind_max_points,
+                max_delay=write_behind_max_delay,
+            )
+            atexit.register(self.write_buffer.close)
+
+    def _upsert_points(self, collection_name: str, points: list):
+        self.client.upsert(collection_name, points=points)
+
+    def flush(self):
+        """Wait until buffered inserts are durable."""
+        if self.write_buffer is not None:
+            self.write_buffer.flush()
+
+    def _query_points(self, collection_name: str, group_by: str = None, **query):
+        """query_points, or the best hit for each value of group_by in ranked order."""
+        if group_by is None:
+            return self.client.query_points(
+                collection_name, timeout=self.search_timeout, **query
+            ).points
+        return group_hits(
+            self.client.query_points_groups(
+                collection_name,
+                group_by=group_by,
+                group_size=1,
+                timeout=self.search_timeout,
+                **query,
+            )
+        )
 
     @override
-    def create_collection(self, collection_name: str):
+    def create_collection(
+        self, collection_name: str, config: CollectionConfig = None
+    ):
         info_message(f"Creating collection: {collection_name}")
+        config = config or get_collection_config(collection_name)
         try:
             self.client.get_collection(collection_name)
             error_message(f"Collection named: {collection_name} already exists")
         except Exception as e:
-            if "Not found" in str(e):
+            if "not found" in str(e).lower():
                 self.client.create_collection(
-                    collection_name,
-                    vectors_config={
-                        "content": VectorParams(size=3072, distance=Distance.COSINE),
-                    },
+                    collection_name, **collection_params(config)
                 )
                 success_message(f"Collection named: {collection_name} created")
+                self.create_payload_indexes(collection_name)
             else:
                 print(f"Error: {e}")
 
+    def update_collection(
+        self, collection_name: str, config: CollectionConfig = None
+    ):
+        """Apply the HNSW, quantization and on-disk settings of config to a live collection."""
+        info_message(f"Updating collection: {collection_name}")
+        config = config or get_collection_config(collection_name)
+        try:
+            self.client.update_collection(
+                collection_name, **collection_update_params(config)
+            )
+            success_message(f"Collection named: {collection_name} updated")
+        except Exception as e:
+            error_message(f"Error: {e}")
+
+    def create_payload_indexes(self, collection_name: str):
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            try:
+                self.client.create_payload_index(
+                    collection_name, field_name=field_name, field_schema=field_schema
+                )
+                success_message(f"Indexed payload field: {field_name}")
+            except Exception as e:
+                error_message(f"Error: {e}")
+
     @override
     def get_collection(self, collection_name: str):
         try:
             collection = self.client.get_collection(collection_name)
             return collection
         except Exception as e:
-            if "Not found" in str(e):
+            if "not found" in str(e).lower():
                 error_message(f"Collection named: {collection_name} not found")
             else:
                 error_message(f"Error: {e}")
@@ -186,31 +694,138 @@ class QdrantDB(VectorDB):
             error_message(f"Error: {e}")
 
     @logging
-    def search(self, collection_name, query, limit=50, filter=None):
+    def search(
+        self,
+        collection_name,
+        query,
+        limit=50,
+        filter=None,
+        using="content",
+        score_threshold=None,
+        fusion="rrf",
+        hybrid=False,
+        profile=None,
+        hnsw_ef=None,
+        exact=None,
+        group_by=None,
+    ):
         info_message(f"Searching in collection: {collection_name} for query: {query}")
         try:
-            embedding = openAIEmbeddings.embed_query(query)
-            query_filter = None
-            if filter is not None:
-                must = []
-                for key, value in filter.items():
-                    must.append(
-                        models.FieldCondition(
-                            key=key,
-                            match=models.MatchValue(
-                                value=value,
-                            ),
-                        )
-                    )
-                query_filter = models.Filter(must=must)
-                # query_filter = filter
-            results = self.client.search(
-                collection_name=collection_name,
-                query_vector=("content", embedding),
-                limit=limit,
-                with_payload=True,
-                with_vectors=False,
-                query_filter=query_filter,
+            config = get_collection_config(collection_name)
+            embeddings = get_query_embeddings(config.model, config.dimensions)
+            embedding = embeddings.embed_query(query)
+            results = self._query_points(
+                collection_name,
+                group_by,
+                **search_request(
+                    config,
+                    query,
+                    embedding,
+                    using=using,
+                    limit=limit,
+                    filter=filter,
+                    score_threshold=score_threshold,
+                    fusion=fusion,
+                    hybrid=hybrid,
+                    profile=profile,
+                    hnsw_ef=hnsw_ef,
+                    exact=exact,
+                ),
+            )
+            success_message(
+                f"Found {len(results)} results (embedding cache: {embeddings.stats()})"
+            )
+            return results
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return []
+
+    def search_batch(
+        self,
+        collection_name,
+        queries: list,
+        limit=50,
+        filters=None,
+        limits=None,
+        using="content",
+        score_threshold=None,
+        fusion="rrf",
+        hybrid=False,
+        profile=None,
+        hnsw_ef=None,
+        exact=None,
+    ):
+        """
+        Run one search per query text. All texts are embedded in one request
+        and all searches go to Qdrant in one batch; filters and limits give
+        per-query overrides. profile, hnsw_ef and exact override the
+        collection's search params (see SEARCH_PROFILES).
+        """
+        info_message(f"Searching in collection: {collection_name} for {len(queries)} queries")
+        filters = filters or [None] * len(queries)
+        limits = limits or [limit] * len(queries)
+        try:
+            config = get_collection_config(collection_name)
+            embeddings = get_query_embeddings(config.model, config.dimensions)
+            vectors = embeddings.embed_documents(queries)
+            requests = search_batch_requests(
+                config,
+                queries,
+                vectors,
+                filters,
+                limits,
+                using=using,
+                score_threshold=score_threshold,
+                fusion=fusion,
+                hybrid=hybrid,
+                profile=profile,
+                hnsw_ef=hnsw_ef,
+                exact=exact,
+            )
+            responses = self.client.query_batch_points(
+                collection_name, requests, timeout=self.search_timeout
+            )
+            return [response.points for response in responses]
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return [[] for _ in queries]
+
+    def recommend(
+        self,
+        collection_name,
+        positive: list,
+        negative: list = None,
+        limit=50,
+        filter=None,
+        using="content",
+        score_threshold=None,
+        fusion="rrf",
+        profile=None,
+        group_by=None,
+    ):
+        """
+        Points similar to the stored points in positive and unlike those in
+        negative. The example vectors are read from Qdrant, so no embedding
+        request is made; the examples themselves are not returned.
+        """
+        info_message(
+            f"Recommending from collection: {collection_name} for points: {positive}"
+        )
+        try:
+            results = self._query_points(
+                collection_name,
+                group_by,
+                **recommend_request(
+                    get_collection_config(collection_name),
+                    positive,
+                    negative,
+                    using=using,
+                    limit=limit,
+                    filter=filter,
+                    score_threshold=score_threshold,
+                    fusion=fusion,
+                    profile=profile,
+                ),
             )
             success_message(f"Found {len(results)} results")
             return results
@@ -225,16 +840,23 @@ class QdrantDB(VectorDB):
         embedding: str,
         payload: dict,
         index=None,
+        wait=True,
     ):
+        """
+        With write-behind enabled the point is queued for a coalesced upsert;
+        wait=False returns the future instead of waiting for the write.
+        """
         try:
             if index is None:
-                index = self.get_collection_size(collection_name)
-            self.client.upsert(
-                collection_name,
-                points=[
-                    {"id": index, "vector": {"content": embedding}, "payload": payload}
-                ],
-            )
+                index = make_point_id(embedding, payload)
+            points = build_points([embedding], [payload], [index])
+            if self.write_buffer is None:
+                self.client.upsert(collection_name, points=points)
+            else:
+                future = self.write_buffer.add(collection_name, points[0])
+                if not wait:
+                    return future
+                future.result()
             success_message(f"Uploaded document with id: {index}")
         except Exception as e:
             error_message(f"Error: {e}")
@@ -248,51 +870,86 @@ class QdrantDB(VectorDB):
         indexes=None,
     ):
         # info_message(f"Uploading {len(embeddings)} documents to {collection_name}")
-        N = len(embeddings)
-        if indexes is None:
-            tmp = self.get_collection_size(collection_name)
-            indexes = [tmp + i for i in range(N)]
-        points = []
-        for i in range(len(embeddings)):
-            metadata = metadatas[i]
-            points.append(
-                {
-                    "id": indexes[i],
-                    "vector": {"content": embeddings[i]},
-                    "payload": metadata,
-                }
-            )
+        points = build_points(embeddings, metadatas, indexes)
         self.client.upsert(collection_name, points=points)
         # success_message(f"Uploaded {len(embeddings)} documents to {collection_name}", newline=True)
 
     @override
-    def batch_insert(self, collection_name, documents: list, batch_size=100):
+    def batch_insert(
+        self,
+        collection_name,
+        documents: list,
+        batch_size=100,
+        parallel=4,
+        max_retries=8,
+        checkpoint_path=None,
+    ):
+        """
+        Upload documents ({"embedding", "metadata"}) with up to `parallel`
+        batches in flight. Failed batches back off exponentially with jitter.
+        Finished batch numbers go to checkpoint_path so an interrupted load
+        resumes where it stopped; point ids are content derived, so replaying
+        a batch is harmless.
+        """
         N = len(documents)
+        batches = range(0, N, batch_size)
+        done = load_checkpoint(checkpoint_path)
+        pending = [i for i in batches if i // batch_size not in done]
+        remaining = sum(min(batch_size, N - i) for i in pending)
+        lock = threading.Lock()
+        uploaded = 0
+        failed = []
+        start_time = time.time()
+
+        def upload(i):
+            batch = documents[i : i + batch_size]
+            retry_with_backoff(
+                lambda: self.bulk_insert(
+                    collection_name=collection_name,
+                    embeddings=[doc["embedding"] for doc in batch],
+                    metadatas=[doc["metadata"] for doc in batch],
+                ),
+                max_retries=max_retries,
+                description=f"batch {i//batch_size + 1}",
+            )
+            return len(batch)
+
         with Progress() as progress:
-            task1 = progress.add_task("[yellow]Uploading to Qdrant", total=N)
-            for i in range(0, N, batch_size):
-                batch = documents[i : i + batch_size]
-                for _ in range(25):
+            task1 = progress.add_task(
+                "[yellow]Uploading to Qdrant", total=N, completed=N - remaining
+            )
+            with ThreadPoolExecutor(max_workers=parallel) as executor:
+                futures = {executor.submit(upload, i): i for i in pending}
+                for future in as_completed(futures):
+                    i = futures[future]
                     try:
-                        progress.update(
-                            task1,
-                            description=f"[yellow]Uploading batch [bold]{i//batch_size + 1}/{N//batch_size + 1}[/bold], [bold]{i}[/bold] to [bold]{min(i+batch_size, N) - 1}[/bold]",
-                        )
-                        embeddings = [doc["embedding"] for doc in batch]
-                        metadatas = [doc["metadata"] for doc in batch]
-                        self.bulk_insert(
-                            collection_name=collection_name,
-                            embeddings=embeddings,
-                            metadatas=metadatas,
-                        )
-                        break
+                        count = future.result()
                     except Exception as e:
-                        error_message(f"Error: {e}")
-                        error_message(
-                            f"Error in batch {i//batch_size + 1}, retrying ... "
-                        )
-                        time.sleep(10)
-                progress.update(task1, advance=len(batch))
+                        error_message(f"Giving up on batch {i//batch_size + 1}: {e}")
+                        failed.append(i // batch_size)
+                        continue
+                    with lock:
+                        uploaded += count
+                        done.add(i // batch_size)
+                        save_checkpoint(checkpoint_path, done)
+                    rate = uploaded / max(time.time() - start_time, 1e-9)
+                    progress.update(
+                        task1,
+                        advance=count,
+                        description=f"[yellow]Uploading to Qdrant [bold]{rate:.0f}[/bold] points/s",
+                    )
+
+        elapsed = time.time() - start_time
+        stats = {
+            "points": uploaded,
+            "seconds": elapsed,
+            "points_per_second": uploaded / elapsed if elapsed else 0,
+            "failed_batches": sorted(failed),
+        }
+        success_message(
+            f"Uploaded {uploaded} points in {elapsed:.1f}s ({stats['points_per_second']:.0f} points/s)"
+        )
+        return stats
 
     @override
     def get_by_id(self, collection_name: str, id: str):
@@ -326,44 +983,1068 @@ class QdrantDB(VectorDB):
         point_count = self.client.count(collection_name)
         return point_count.count
 
+    def iter_range(
+        self,
+        l,
+        r,
+        user_id,
+        collection_name: str,
+        page_size=64,
+        fields=None,
+        geo: dict = None,
+    ):
+        """
+        Yield every point of user_id created in [l, r], oldest first,
+        optionally restricted by geo conditions such as
+        {"location": geo_radius(lat, lon, radius_km)}. See RangeScroll.
+        """
+        scroll = RangeScroll(l, r, user_id, collection_name, page_size, fields, geo)
+        while not scroll.done:
+            points, _ = self.client.scroll(**scroll.request())
+            yield from scroll.page(points)
+
     @override
     def get_range(self, l, r, user_id, collection_name: str):
         print("Getting range")
-        time_filter = Filter(
-            must=[
-                models.FieldCondition(
-                    key="created_at",
-                    range=models.Range(
-                        gt=None,
-                        gte=l,
-                        lt=None,
-                        lte=r,
-                    ),
+        return list(self.iter_range(l, r, user_id, collection_name)), None
+
+    @override
+    def head_collection(self, collection_name: str, limit=5):
+        try:
+            result = self.client.scroll(collection_name, limit=limit)
+            return result
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return
+
+
+class AsyncQdrantDB(VectorDB):
+    """QdrantDB counterpart for async code paths, built on AsyncQdrantClient."""
+
+    def __init__(
+        self,
+        host: str,
+        api_key: str,
+        write_behind: bool = False,
+        write_behind_max_points: int = 64,
+        write_behind_max_delay: float = 0.05,
+        client_options: dict = None,
+        search_timeout: int = None,
+    ):
+        super().__init__()
+        self.client = AsyncQdrantClient(
+            host, api_key=api_key, **(client_options or {"timeout": 60})
+        )
+        self.search_timeout = search_timeout
+        self.write_buffer = None
+        if write_behind:
+            self.write_buffer = AsyncWriteBehindBuffer(
+                self._upsert_points,
+                max_points=write_behind_max_points,
+                max_delay=write_behind_max_delay,
+            )
+
+    async def _upsert_points(self, collection_name: str, points: list):
+        await self.client.upsert(collection_name, points=points)
+
+    async def flush(self):
+        """Wait until buffered inserts are durable."""
+        if self.write_buffer is not None:
+            await self.write_buffer.flush()
+
+    async def _query_points(self, collection_name: str, group_by: str = None, **query):
+        """query_points, or the best hit for each value of group_by in ranked order."""
+        if group_by is None:
+            response = await self.client.query_points(
+                collection_name, timeout=self.search_timeout, **query
+            )
+            return response.points
+        return group_hits(
+            await self.client.query_points_groups(
+                collection_name,
+                group_by=group_by,
+                group_size=1,
+                timeout=self.search_timeout,
+                **query,
+            )
+        )
+
+    @override
+    async def create_collection(
+        self, collection_name: str, config: CollectionConfig = None
+    ):
+        info_message(f"Creating collection: {collection_name}")
+        config = config or get_collection_config(collection_name)
+        try:
+            await self.client.get_collection(collection_name)
+            error_message(f"Collection named: {collection_name} already exists")
+        except Exception as e:
+            if "not found" in str(e).lower():
+                await self.client.create_collection(
+                    collection_name, **collection_params(config)
+                )
+                success_message(f"Collection named: {collection_name} created")
+                await self.create_payload_indexes(collection_name)
+            else:
+                print(f"Error: {e}")
+
+    async def update_collection(
+        self, collection_name: str, config: CollectionConfig = None
+    ):
+        """Apply the HNSW, quantization and on-disk settings of config to a live collection."""
+        info_message(f"Updating collection: {collection_name}")
+        config = config or get_collection_config(collection_name)
+        try:
+            await self.client.update_collection(
+                collection_name, **collection_update_params(config)
+            )
+            success_message(f"Collection named: {collection_name} updated")
+        except Exception as e:
+            error_message(f"Error: {e}")
+
+    async def create_payload_indexes(self, collection_name: str):
+        for field_name, field_schema in PAYLOAD_INDEXES.items():
+            try:
+                await self.client.create_payload_index(
+                    collection_name, field_name=field_name, field_schema=field_schema
+                )
+                success_message(f"Indexed payload field: {field_name}")
+            except Exception as e:
+                error_message(f"Error: {e}")
+
+    @override
+    async def get_collection(self, collection_name: str):
+        try:
+            collection = await self.client.get_collection(collection_name)
+            return collection
+        except Exception as e:
+            if "not found" in str(e).lower():
+                error_message(f"Collection named: {collection_name} not found")
+            else:
+                error_message(f"Error: {e}")
+        return None
+
+    @override
+    async def delete_collection(self, collection_name: str):
+        info_message(f"Deleting collection: {collection_name}")
+        col = await self.get_collection(collection_name)
+        if col is None:
+            return
+        try:
+            await self.client.delete_collection(collection_name)
+            success_message(f"Collection named: {collection_name} deleted")
+        except Exception as e:
+            error_message(f"Error: {e}")
+
+    @override
+    async def delete_by_id(self, collection_name: str, id: str):
+        info_message(
+            f"Deleting document with id: {id} from collection: {collection_name}"
+        )
+        try:
+            await self.client.delete(collection_name, [id])
+            success_message(f"Deleted document with id: {id}")
+        except Exception as e:
+            error_message(f"Error: {e}")
+
+    @override
+    async def bulk_delete(self, collection_name: str, id: list):
+        info_message(
+            f"Deleting documents with id: {id} from collection: {collection_name}"
+        )
+        try:
+            await self.client.delete(collection_name, id)
+            success_message(f"Deleted documents with id: {id}")
+        except Exception as e:
+            error_message(f"Error: {e}")
+
+    @override
+    @logging
+    async def search(
+        self,
+        collection_name,
+        query,
+        limit=50,
+        filter=None,
+        using="content",
+        score_threshold=None,
+        fusion="rrf",
+        hybrid=False,
+        profile=None,
+        hnsw_ef=None,
+        exact=None,
+        group_by=None,
+    ):
+        info_message(f"Searching in collection: {collection_name} for query: {query}")
+        try:
+            config = get_collection_config(collection_name)
+            embeddings = get_query_embeddings(config.model, config.dimensions)
+            embedding = await embeddings.aembed_query(query)
+            results = await self._query_points(
+                collection_name,
+                group_by,
+                **search_request(
+                    config,
+                    query,
+                    embedding,
+                    using=using,
+                    limit=limit,
+                    filter=filter,
+                    score_threshold=score_threshold,
+                    fusion=fusion,
+                    hybrid=hybrid,
+                    profile=profile,
+                    hnsw_ef=hnsw_ef,
+                    exact=exact,
                 ),
-                models.FieldCondition(
-                    key="user_id",
-                    match=models.MatchValue(
-                        value=user_id,
-                    ),
+            )
+            success_message(
+                f"Found {len(results)} results (embedding cache: {embeddings.stats()})"
+            )
+            return results
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return []
+
+    async def search_batch(
+        self,
+        collection_name,
+        queries: list,
+        limit=50,
+        filters=None,
+        limits=None,
+        using="content",
+        score_threshold=None,
+        fusion="rrf",
+        hybrid=False,
+        profile=None,
+        hnsw_ef=None,
+        exact=None,
+    ):
+        """
+        Run one search per query text. All texts are embedded in one request
+        and all searches go to Qdrant in one batch; filters and limits give
+        per-query overrides. profile, hnsw_ef and exact override the
+        collection's search params (see SEARCH_PROFILES).
+        """
+        info_message(f"Searching in collection: {collection_name} for {len(queries)} queries")
+        filters = filters or [None] * len(queries)
+        limits = limits or [limit] * len(queries)
+        try:
+            config = get_collection_config(collection_name)
+            embeddings = get_query_embeddings(config.model, config.dimensions)
+            vectors = await embeddings.aembed_documents(queries)
+            requests = search_batch_requests(
+                config,
+                queries,
+                vectors,
+                filters,
+                limits,
+                using=using,
+                score_threshold=score_threshold,
+                fusion=fusion,
+                hybrid=hybrid,
+                profile=profile,
+                hnsw_ef=hnsw_ef,
+                exact=exact,
+            )
+            responses = await self.client.query_batch_points(
+                collection_name, requests, timeout=self.search_timeout
+            )
+            return [response.points for response in responses]
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return [[] for _ in queries]
+
+    async def recommend(
+        self,
+        collection_name,
+        positive: list,
+        negative: list = None,
+        limit=50,
+        filter=None,
+        using="content",
+        score_threshold=None,
+        fusion="rrf",
+        profile=None,
+        group_by=None,
+    ):
+        """
+        Points similar to the stored points in positive and unlike those in
+        negative. The example vectors are read from Qdrant, so no embedding
+        request is made; the examples themselves are not returned.
+        """
+        info_message(
+            f"Recommending from collection: {collection_name} for points: {positive}"
+        )
+        try:
+            results = await self._query_points(
+                collection_name,
+                group_by,
+                **recommend_request(
+                    get_collection_config(collection_name),
+                    positive,
+                    negative,
+                    using=using,
+                    limit=limit,
+                    filter=filter,
+                    score_threshold=score_threshold,
+                    fusion=fusion,
+                    profile=profile,
                 ),
+            )
+            success_message(f"Found {len(results)} results")
+            return results
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return []
+
+    @override
+    async def insert(
+        self,
+        collection_name: str,
+        embedding: str,
+        payload: dict,
+        index=None,
+        wait=True,
+    ):
+        """
+        With write-behind enabled the point is queued for a coalesced upsert;
+        wait=False returns the future instead of waiting for the write.
+        """
+        try:
+            if index is None:
+                index = make_point_id(embedding, payload)
+            points = build_points([embedding], [payload], [index])
+            if self.write_buffer is None:
+                await self.client.upsert(collection_name, points=points)
+            else:
+                future = self.write_buffer.add(collection_name, points[0])
+                if not wait:
+                    return future
+                await future
+            success_message(f"Uploaded document with id: {index}")
+        except Exception as e:
+            error_message(f"Error: {e}")
+
+    @override
+    async def bulk_insert(
+        self,
+        collection_name: str,
+        embeddings: list,
+        metadatas: list,
+        indexes=None,
+    ):
+        points = build_points(embeddings, metadatas, indexes)
+        await self.client.upsert(collection_name, points=points)
+
+    @override
+    async def get_by_id(self, collection_name: str, id: str):
+        try:
+            result = await self.client.retrieve(
+                collection_name=collection_name, ids=[id]
+            )
+            return result
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return None
+
+    @override
+    async def bulk_get_by_id(self, collection_name: str, ids: list):
+        try:
+            result = await self.client.retrieve(
+                collection_name=collection_name, ids=ids
+            )
+            return result
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return None
+
+    @override
+    async def get_collections(self):
+        try:
+            collections = await self.client.get_collections()
+            return collections
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return []
+
+    @override
+    async def get_collection_size(self, collection_name: str):
+        point_count = await self.client.count(collection_name)
+        return point_count.count
+
+    async def iter_range(
+        self,
+        l,
+        r,
+        user_id,
+        collection_name: str,
+        page_size=64,
+        fields=None,
+        geo: dict = None,
+    ):
+        scroll = RangeScroll(l, r, user_id, collection_name, page_size, fields, geo)
+        while not scroll.done:
+            points, _ = await self.client.scroll(**scroll.request())
+            for point in scroll.page(points):
+                yield point
+
+    async def get_range(self, l, r, user_id, collection_name: str):
+        points = [
+            point async for point in self.iter_range(l, r, user_id, collection_name)
+        ]
+        return points, None
+
+    @override
+    async def head_collection(self, collection_name: str, limit=5):
+        try:
+            result = await self.client.scroll(collection_name, limit=limit)
+            return result
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return
+
+
+def rrf_fuse(rankings: list, limit: int, k: int = 60):
+    """Reciprocal rank fusion of several ranked lists of row numbers."""
+    scores = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            scores[row] = scores.get(row, 0) + 1 / (k + rank + 1)
+    fused = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return fused[:limit]
+
+
+def resized(column, n: int, capacity: int, fill):
+    """Copy of the first n entries of column, padded with fill to capacity."""
+    grown = np.full(capacity, fill, dtype=column.dtype)
+    grown[:n] = column[:n]
+    return grown
+
+
+def payload_key(value):
+    """Hashable form of a payload value, for NumpyDB's dictionary-encoded columns."""
+    return json.dumps(value, sort_keys=True)
+
+
+class NumpyDB(VectorDB):
+    """
+    In-process VectorDB without a Qdrant server.
+
+    Each named vector is a row-normalized float16/float32 matrix (memory-mapped
+    .npy files when a path is given). Every payload field is also kept as typed
+    columns: int32 codes of its dictionary-encoded values for equality filters
+    and grouping, and float64 values for range filters. Search is exact: a
+    vectorized dot product over every live row, masked by the payload filter.
+    Sparse vectors are not stored, so hybrid searches fall back to the dense
+    vectors. Meant for small tenants, tests and as the exact baseline in
+    benchmarks.
+
+    Writes append to payload.jsonl; flush() syncs the vector files and compacts
+    the log, and runs at exit.
+    """
+
+    CHUNK_ROWS = 65536
+
+    def __init__(self, path: str = None, dtype: str = "float16"):
+        super().__init__()
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.collections = {}
+        self._lock = threading.RLock()
+        if path:
+            os.makedirs(path, exist_ok=True)
+            for collection_name in sorted(os.listdir(path)):
+                if os.path.exists(self._file(collection_name, "config.json")):
+                    self._load(collection_name)
+            atexit.register(self.flush)
+
+    def _file(self, collection_name: str, name: str):
+        return os.path.join(self.path, collection_name, name)
+
+    def _allocate(self, collection_name: str, name: str, rows: int, dims: int):
+        if not self.path:
+            return np.zeros((rows, dims), dtype=self.dtype)
+        return np.lib.format.open_memmap(
+            self._file(collection_name, f"{name}.npy"),
+            mode="w+",
+            dtype=self.dtype,
+            shape=(rows, dims),
+        )
+
+    def _empty(self, config: CollectionConfig, vectors: dict):
+        capacity = len(next(iter(vectors.values())))
+        return {
+            "config": config,
+            "ids": [],
+            "rows": {},
+            "payloads": [],
+            "alive": np.zeros(capacity, dtype=bool),
+            "codes": {},
+            "numbers": {},
+            "vocab": {},
+            "vectors": vectors,
+        }
+
+    def _load(self, collection_name: str):
+        with open(self._file(collection_name, "config.json")) as f:
+            config = CollectionConfig(**json.load(f))
+        collection = self._empty(
+            config,
+            {
+                name: np.load(self._file(collection_name, f"{name}.npy"), mmap_mode="r+")
+                for name in config.vector_names
+            },
+        )
+        self.collections[collection_name] = collection
+        with open(self._file(collection_name, "payload.jsonl")) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    warning_message(f"Skipping truncated record in {collection_name}/payload.jsonl")
+                    break
+                if "delete" in record:
+                    row = collection["rows"].get(record["delete"])
+                    if row is not None:
+                        collection["alive"][row] = False
+                    continue
+                row = record["row"]
+                while len(collection["ids"]) <= row:
+                    collection["ids"].append(None)
+                    collection["payloads"].append({})
+                collection["ids"][row] = record["id"]
+                collection["rows"][record["id"]] = row
+                self._set_payload(collection, row, record["payload"])
+                collection["alive"][row] = True
+
+    def _append(self, collection_name: str, records: list):
+        if not self.path:
+            return
+        with open(self._file(collection_name, "payload.jsonl"), "a") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in records))
+
+    def flush(self, collection_name: str = None):
+        """Sync the vector files and rewrite payload.jsonl with only the live points."""
+        if not self.path:
+            return
+        with self._lock:
+            for name in [collection_name] if collection_name else list(self.collections):
+                collection = self.collections[name]
+                for matrix in collection["vectors"].values():
+                    matrix.flush()
+                path = self._file(name, "payload.jsonl")
+                with open(path + ".tmp", "w") as f:
+                    for row in np.flatnonzero(self._rows(name)):
+                        record = {
+                            "id": collection["ids"][row],
+                            "row": int(row),
+                            "payload": collection["payloads"][row],
+                        }
+                        f.write(json.dumps(record) + "\n")
+                os.replace(path + ".tmp", path)
+
+    def _grow(self, collection_name: str, rows: int):
+        collection = self.collections[collection_name]
+        capacity = len(collection["alive"])
+        if rows <= capacity:
+            return
+        capacity = max(rows, capacity * 2, 1024)
+        n = len(collection["ids"])
+        for name, matrix in collection["vectors"].items():
+            grown = np.zeros((capacity, matrix.shape[1]), dtype=self.dtype)
+            grown[:n] = matrix[:n]
+            del matrix
+            collection["vectors"][name] = self._allocate(
+                collection_name, name, capacity, grown.shape[1]
+            )
+            collection["vectors"][name][:] = grown
+        collection["alive"] = resized(collection["alive"], n, capacity, False)
+        for key in collection["codes"]:
+            collection["codes"][key] = resized(collection["codes"][key], n, capacity, 0)
+            collection["numbers"][key] = resized(
+                collection["numbers"][key], n, capacity, np.nan
+            )
+
+    def _set_payload(self, collection: dict, row: int, payload: dict):
+        """Store a row's payload and update its typed columns."""
+        capacity = len(collection["alive"])
+        for key in collection["payloads"][row].keys() | payload.keys():
+            if key not in collection["codes"]:
+                collection["codes"][key] = np.zeros(capacity, dtype=np.int32)
+                collection["numbers"][key] = np.full(capacity, np.nan)
+                collection["vocab"][key] = {}
+            value = payload.get(key)
+            vocab = collection["vocab"][key]
+            collection["codes"][key][row] = (
+                0 if value is None else vocab.setdefault(payload_key(value), len(vocab) + 1)
+            )
+            numeric = isinstance(value, (int, float)) and not isinstance(value, bool)
+            collection["numbers"][key][row] = value if numeric else np.nan
+        collection["payloads"][row] = payload
+
+    def _rows(self, collection_name: str):
+        collection = self.collections[collection_name]
+        return collection["alive"][: len(collection["ids"])]
+
+    def _mask(self, collection_name: str, filter: dict = None, ranges: dict = None):
+        collection = self.collections[collection_name]
+        n = len(collection["ids"])
+        mask = self._rows(collection_name).copy()
+        for key, value in (filter or {}).items():
+            if isinstance(value, (models.GeoRadius, models.GeoBoundingBox)):
+                rows = np.flatnonzero(mask)
+                keep = [geo_matches(value, collection["payloads"][row].get(key)) for row in rows]
+                mask[rows[~np.array(keep, dtype=bool)]] = False
+                continue
+            code = collection["vocab"].get(key, {}).get(payload_key(value))
+            if code is None:
+                mask[:] = False
+                continue
+            mask &= collection["codes"][key][:n] == code
+        for key, (gte, lte) in (ranges or {}).items():
+            if key not in collection["numbers"]:
+                mask[:] = False
+                continue
+            column = collection["numbers"][key][:n]
+            mask &= (column >= gte) & (column <= lte)
+        return mask
+
+    def _payload(self, collection_name: str, row: int):
+        return dict(self.collections[collection_name]["payloads"][row])
+
+    def _record(self, collection_name: str, row: int, with_vectors=False):
+        collection = self.collections[collection_name]
+        vector = None
+        if with_vectors:
+            vector = {
+                name: matrix[row].astype(np.float32).tolist()
+                for name, matrix in collection["vectors"].items()
+            }
+        return models.Record(
+            id=collection["ids"][row],
+            payload=self._payload(collection_name, row),
+            vector=vector,
+        )
+
+    def _scores(self, matrix, n: int, vector):
+        query = np.asarray(vector, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, self.CHUNK_ROWS):
+            chunk = matrix[start : start + self.CHUNK_ROWS][: n - start]
+            scores[start : start + len(chunk)] = chunk.astype(np.float32) @ query
+        return scores
+
+    def _top(self, scores, mask, limit: int, score_threshold=None):
+        candidates = np.flatnonzero(mask)
+        if score_threshold is not None:
+            candidates = candidates[scores[candidates] >= score_threshold]
+        if len(candidates) > limit:
+            part = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[part]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    @override
+    def create_collection(self, collection_name: str, config: CollectionConfig = None):
+        info_message(f"Creating collection: {collection_name}")
+        config = config or get_collection_config(collection_name)
+        with self._lock:
+            if collection_name in self.collections:
+                error_message(f"Collection named: {collection_name} already exists")
+                return
+            if self.path:
+                os.makedirs(os.path.join(self.path, collection_name), exist_ok=True)
+                with open(self._file(collection_name, "config.json"), "w") as f:
+                    json.dump(config.model_dump(), f)
+                open(self._file(collection_name, "payload.jsonl"), "w").close()
+            self.collections[collection_name] = self._empty(
+                config,
+                {
+                    name: self._allocate(collection_name, name, 0, config.dimensions)
+                    for name in config.vector_names
+                },
+            )
+        success_message(f"Collection named: {collection_name} created")
+
+    @override
+    def get_collection(self, collection_name: str):
+        collection = self.collections.get(collection_name)
+        if collection is None:
+            error_message(f"Collection named: {collection_name} not found")
+            return None
+        return {
+            "name": collection_name,
+            "config": collection["config"],
+            "points_count": self.get_collection_size(collection_name),
+        }
+
+    @override
+    def get_collections(self):
+        return models.CollectionsResponse(
+            collections=[
+                models.CollectionDescription(name=name) for name in self.collections
             ]
         )
-        response = self.client.scroll(
-            collection_name=collection_name, scroll_filter=time_filter, limit=10
+
+    @override
+    def delete_collection(self, collection_name: str):
+        info_message(f"Deleting collection: {collection_name}")
+        with self._lock:
+            if self.collections.pop(collection_name, None) is None:
+                error_message(f"Collection named: {collection_name} not found")
+                return
+            if self.path:
+                shutil.rmtree(os.path.join(self.path, collection_name))
+        success_message(f"Collection named: {collection_name} deleted")
+
+    @override
+    def get_collection_size(self, collection_name: str):
+        return int(self._rows(collection_name).sum())
+
+    @override
+    def insert(
+        self,
+        collection_name: str,
+        embedding: str,
+        payload: dict,
+        index=None,
+    ):
+        if index is None:
+            index = make_point_id(embedding, payload)
+        self.bulk_insert(collection_name, [embedding], [payload], [index])
+        success_message(f"Uploaded document with id: {index}")
+
+    @override
+    def bulk_insert(
+        self,
+        collection_name: str,
+        embeddings: list,
+        metadatas: list,
+        indexes=None,
+    ):
+        points = build_points(embeddings, metadatas, indexes)
+        with self._lock:
+            collection = self.collections[collection_name]
+            new = [p.id for p in points if p.id not in collection["rows"]]
+            self._grow(collection_name, len(collection["ids"]) + len(new))
+            for id in new:
+                collection["rows"][id] = len(collection["ids"])
+                collection["ids"].append(id)
+                collection["payloads"].append({})
+            records = []
+            for point in points:
+                row = collection["rows"][point.id]
+                for name, vector in point.vector.items():
+                    if name not in collection["vectors"]:
+                        continue
+                    vector = np.asarray(vector, dtype=np.float32)
+                    collection["vectors"][name][row] = vector / (
+                        np.linalg.norm(vector) or 1
+                    )
+                self._set_payload(collection, row, point.payload)
+                collection["alive"][row] = True
+                records.append({"id": point.id, "row": row, "payload": point.payload})
+            self._append(collection_name, records)
+
+    def _rank(
+        self,
+        collection_name: str,
+        queries: dict,
+        mask,
+        limit: int,
+        score_threshold=None,
+        group_by: str = None,
+    ):
+        """
+        Rows ranked for {vector name: query vector}, fused with RRF when
+        there are several. With group_by only the best row for each value of
+        that payload field is kept, like Qdrant's query_points_groups.
+        """
+        collection = self.collections[collection_name]
+        n = len(collection["ids"])
+        depth = int(mask.sum()) if group_by else limit
+        if len(queries) == 1:
+            (name, vector), = queries.items()
+            scores = self._scores(collection["vectors"][name], n, vector)
+            top = self._top(scores, mask, depth, score_threshold)
+            hits = [(row, float(scores[row])) for row in top]
+        else:
+            rankings = []
+            for name, vector in queries.items():
+                scores = self._scores(collection["vectors"][name], n, vector)
+                rankings.append(self._top(scores, mask, depth, score_threshold))
+            hits = rrf_fuse(rankings, depth)
+        if group_by:
+            codes = collection["codes"].get(group_by, np.zeros(n, dtype=np.int32))
+            seen = set()
+            grouped = []
+            for row, score in hits:
+                code = int(codes[row])
+                if code == 0 or code in seen:
+                    continue
+                seen.add(code)
+                grouped.append((row, score))
+                if len(grouped) == limit:
+                    break
+            hits = grouped
+        return [
+            models.ScoredPoint(
+                id=collection["ids"][row],
+                version=0,
+                score=score,
+                payload=self._payload(collection_name, row),
+            )
+            for row, score in hits
+        ]
+
+    def search_by_vector(
+        self,
+        collection_name,
+        vector,
+        limit=50,
+        filter=None,
+        using="content",
+        score_threshold=None,
+        group_by=None,
+    ):
+        """Exact search with an already embedded query."""
+        names = [using] if isinstance(using, str) else using
+        return self._rank(
+            collection_name,
+            {name: vector for name in names},
+            self._mask(collection_name, filter),
+            limit,
+            score_threshold,
+            group_by,
         )
-        return response
 
     @override
-    def head_collection(self, collection_name: str, limit=5):
+    def search(
+        self,
+        collection_name,
+        query,
+        limit=50,
+        filter=None,
+        using="content",
+        score_threshold=None,
+        fusion="rrf",
+        hybrid=False,
+        profile=None,
+        hnsw_ef=None,
+        exact=None,
+        group_by=None,
+    ):
+        """
+        Same arguments as QdrantDB.search. Search is always exact, so profile,
+        hnsw_ef and exact are ignored, and several vector names are always
+        fused with RRF. Sparse vectors are not stored, so hybrid searches only
+        the dense vectors.
+        """
+        if hybrid:
+            warning_message("NumpyDB has no sparse vectors, searching dense vectors only")
+        info_message(f"Searching in collection: {collection_name} for query: {query}")
         try:
-            result = self.client.scroll(collection_name, limit=limit)
-            return result
+            config = self.collections[collection_name]["config"]
+            embeddings = get_query_embeddings(config.model, config.dimensions)
+            embedding = embeddings.embed_query(query)
+            results = self.search_by_vector(
+                collection_name,
+                embedding,
+                limit=limit,
+                filter=filter,
+                using=using,
+                score_threshold=score_threshold,
+                group_by=group_by,
+            )
+            success_message(f"Found {len(results)} results")
+            return results
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return []
+
+    def search_batch(
+        self,
+        collection_name,
+        queries: list,
+        limit=50,
+        filters=None,
+        limits=None,
+        using="content",
+        score_threshold=None,
+        fusion="rrf",
+        hybrid=False,
+        profile=None,
+        hnsw_ef=None,
+        exact=None,
+    ):
+        if hybrid:
+            warning_message("NumpyDB has no sparse vectors, searching dense vectors only")
+        info_message(f"Searching in collection: {collection_name} for {len(queries)} queries")
+        try:
+            filters = filters or [None] * len(queries)
+            limits = limits or [limit] * len(queries)
+            config = self.collections[collection_name]["config"]
+            embeddings = get_query_embeddings(config.model, config.dimensions)
+            vectors = embeddings.embed_documents(queries)
+            return [
+                self.search_by_vector(
+                    collection_name,
+                    vector,
+                    limit=query_limit,
+                    filter=query_filter,
+                    using=using,
+                    score_threshold=score_threshold,
+                )
+                for vector, query_filter, query_limit in zip(vectors, filters, limits)
+            ]
         except Exception as e:
             error_message(f"Error: {e}")
+            return [[] for _ in queries]
+
+    def recommend(
+        self,
+        collection_name,
+        positive: list,
+        negative: list = None,
+        limit=50,
+        filter=None,
+        using="content",
+        score_threshold=None,
+        fusion="rrf",
+        profile=None,
+        group_by=None,
+    ):
+        """
+        Same arguments as QdrantDB.recommend. The query is Qdrant's
+        average_vector strategy over the stored example vectors,
+        avg(positive) + (avg(positive) - avg(negative)); examples are excluded.
+        """
+        info_message(
+            f"Recommending from collection: {collection_name} for points: {positive}"
+        )
+        try:
+            collection = self.collections[collection_name]
+            names = [using] if isinstance(using, str) else using
+            positive_rows = [
+                collection["rows"][id] for id in positive if id in collection["rows"]
+            ]
+            negative_rows = [
+                collection["rows"][id] for id in negative or [] if id in collection["rows"]
+            ]
+            if not positive_rows:
+                error_message(f"None of the points {positive} are in {collection_name}")
+                return []
+            queries = {}
+            for name in names:
+                matrix = collection["vectors"][name]
+                query = matrix[positive_rows].astype(np.float32).mean(axis=0)
+                if negative_rows:
+                    query += query - matrix[negative_rows].astype(np.float32).mean(axis=0)
+                queries[name] = query
+            mask = self._mask(collection_name, filter)
+            mask[positive_rows + negative_rows] = False
+            results = self._rank(
+                collection_name, queries, mask, limit, score_threshold, group_by
+            )
+            success_message(f"Found {len(results)} results")
+            return results
+        except Exception as e:
+            error_message(f"Error: {e}")
+            return []
+
+    @override
+    def delete_by_id(self, collection_name: str, id: str):
+        self.bulk_delete(collection_name, [id])
+
+    @override
+    def bulk_delete(self, collection_name: str, id: list):
+        info_message(
+            f"Deleting documents with id: {id} from collection: {collection_name}"
+        )
+        with self._lock:
+            collection = self.collections[collection_name]
+            for point_id in id:
+                row = collection["rows"].get(point_id)
+                if row is not None:
+                    collection["alive"][row] = False
+            self._append(collection_name, [{"delete": point_id} for point_id in id])
+        success_message(f"Deleted documents with id: {id}")
+
+    @override
+    def get_by_id(self, collection_name: str, id: str):
+        return self.bulk_get_by_id(collection_name, [id])
+
+    @override
+    def bulk_get_by_id(self, collection_name: str, ids: list, with_vectors=False):
+        collection = self.collections[collection_name]
+        rows = [collection["rows"].get(id) for id in ids]
+        return [
+            self._record(collection_name, row, with_vectors)
+            for row in rows
+            if row is not None and collection["alive"][row]
+        ]
+
+    def iter_range(
+        self,
+        l,
+        r,
+        user_id,
+        collection_name: str,
+        page_size=64,
+        fields=None,
+        geo: dict = None,
+    ):
+        collection = self.collections[collection_name]
+        mask = self._mask(
+            collection_name, {"user_id": user_id, **(geo or {})}, {"created_at": (l, r)}
+        )
+        rows = np.flatnonzero(mask)
+        if not len(rows):
             return
+        created_at = collection["numbers"]["created_at"][rows]
+        for row in rows[np.argsort(created_at, kind="stable")]:
+            record = self._record(collection_name, row)
+            if fields is not None:
+                record.payload = {
+                    key: value for key, value in record.payload.items() if key in fields
+                }
+            yield record
+
+    def get_range(self, l, r, user_id, collection_name: str):
+        return list(self.iter_range(l, r, user_id, collection_name)), None
 
+    @override
+    def head_collection(self, collection_name: str, limit=5):
+        rows = np.flatnonzero(self._rows(collection_name))[:limit]
+        return [self._record(collection_name, row) for row in rows], None
 
+
+client_options = qdrant_client_options(
+    prefer_grpc=settings.QDRANT_PREFER_GRPC,
+    grpc_port=settings.QDRANT_GRPC_PORT,
+    compression=settings.QDRANT_GRPC_COMPRESSION,
+    timeout=settings.QDRANT_TIMEOUT,
+    pool_size=settings.QDRANT_POOL_SIZE,
+    keepalive_connections=settings.QDRANT_KEEPALIVE_CONNECTIONS,
+    max_message_mb=settings.QDRANT_MAX_MESSAGE_MB,
+)
 qdrant_db = QdrantDB(
     host=settings.QDRANT_HOST,
     api_key=settings.QDRANT_API_KEY,
+    write_behind=settings.QDRANT_WRITE_BEHIND,
+    write_behind_max_points=settings.QDRANT_WRITE_BEHIND_MAX_POINTS,
+    write_behind_max_delay=settings.QDRANT_WRITE_BEHIND_MAX_DELAY,
+    client_options=client_options,
+    search_timeout=settings.QDRANT_SEARCH_TIMEOUT,
+)
+async_qdrant_db = AsyncQdrantDB(
+    host=settings.QDRANT_HOST,
+    api_key=settings.QDRANT_API_KEY,
+    write_behind=settings.QDRANT_WRITE_BEHIND,
+    write_behind_max_points=settings.QDRANT_WRITE_BEHIND_MAX_POINTS,
+    write_behind_max_delay=settings.QDRANT_WRITE_BEHIND_MAX_DELAY,
+    client_options=client_options,
+    search_timeout=settings.QDRANT_SEARCH_TIMEOUT,
 )
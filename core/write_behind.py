@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+
+class WriteBehindBuffer:
+    """
+    Coalesces points written by concurrent callers into one upsert per
+    collection. A flush happens once a collection has max_points pending or
+    the oldest pending point has waited max_delay seconds. add() returns a
+    Future that resolves when the point's upsert has been acknowledged.
+    """
+
+    def __init__(self, flush_points, max_points: int = 64, max_delay: float = 0.05):
+        self.flush_points = flush_points
+        self.max_points = max_points
+        self.max_delay = max_delay
+        self.flushes = 0
+        self.flushed_points = 0
+        self._pending = {}
+        self._in_flight = []
+        self._oldest = None
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, collection_name: str, point) -> Future:
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Write-behind buffer is closed")
+            self._pending.setdefault(collection_name, []).append((point, future))
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._condition.notify()
+        return future
+
+    def _due(self):
+        if not self._pending:
+            return False
+        if self._closed:
+            return True
+        if any(len(batch) >= self.max_points for batch in self._pending.values()):
+            return True
+        return time.monotonic() - self._oldest >= self.max_delay
+
+    def _take(self):
+        with self._condition:
+            while not self._due():
+                if self._closed:
+                    return None
+                timeout = None
+                if self._oldest is not None:
+                    timeout = max(0, self.max_delay - (time.monotonic() - self._oldest))
+                self._condition.wait(timeout)
+            pending, self._pending, self._oldest = self._pending, {}, None
+            self._in_flight = [f for batch in pending.values() for _, f in batch]
+            return pending
+
+    def _write(self, collection_name: str, batch: list):
+        try:
+            self.flush_points(collection_name, [point for point, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.flushes += 1
+        self.flushed_points += len(batch)
+        for _, future in batch:
+            future.set_result(True)
+
+    def _run(self):
+        while True:
+            pending = self._take()
+            if pending is None:
+                return
+            for collection_name, batch in pending.items():
+                for i in range(0, len(batch), self.max_points):
+                    self._write(collection_name, batch[i : i + self.max_points])
+            with self._condition:
+                self._in_flight = []
+
+    def flush(self):
+        """Block until every point added so far has been written."""
+        with self._condition:
+            futures = self._in_flight + [
+                f for batch in self._pending.values() for _, f in batch
+            ]
+            self._oldest = float("-inf") if self._pending else None
+            self._condition.notify()
+        for future in futures:
+            future.exception()
+
+    def close(self):
+        self.flush()
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def stats(self) -> dict:
+        return {
+            "flushes": self.flushes,
+            "points": self.flushed_points,
+            "avg_points_per_flush": self.flushed_points / self.flushes
+            if self.flushes
+            else 0,
+        }
+
+
+class AsyncWriteBehindBuffer:
+    """WriteBehindBuffer for coroutines sharing one event loop."""
+
+    def __init__(self, flush_points, max_points: int = 64, max_delay: float = 0.05):
+        self.flush_points = flush_points
+        self.max_points = max_points
+        self.max_delay = max_delay
+        self.flushes = 0
+        self.flushed_points = 0
+        self._pending = {}
+        self._timer = None
+        self._tasks = set()
+
+    def add(self, collection_name: str, point) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(collection_name, [])
+        batch.append((point, future))
+        if len(batch) >= self.max_points:
+            self._spawn(collection_name)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._spawn_all)
+        return future
+
+    def _spawn(self, collection_name: str):
+        batch = self._pending.pop(collection_name)
+        task = asyncio.create_task(self._write(collection_name, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _spawn_all(self):
+        self._timer = None
+        for collection_name in list(self._pending):
+            self._spawn(collection_name)
+
+    async def _write(self, collection_name: str, batch: list):
+        try:
+            await self.flush_points(collection_name, [point for point, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        self.flushes += 1
+        self.flushed_points += len(batch)
+        for _, future in batch:
+            if not future.done():
+                future.set_result(True)
+
+    async def flush(self):
+        """Wait until every point added so far has been written."""
+        if self._timer is not None:
+            self._timer.cancel()
+        self._spawn_all()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "flushes": self.flushes,
+            "points": self.flushed_points,
+            "avg_points_per_flush": self.flushed_points / self.flushes
+            if self.flushes
+            else 0,
+        }
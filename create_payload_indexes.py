@@ -0,0 +1,13 @@
+import sys
+
+from core.collection_config import get_collection_config
+from core.vector_db import qdrant_db
+
+collection_name = sys.argv[1] if len(sys.argv) > 1 else "image_descriptions"
+
+qdrant_db.create_payload_indexes(collection_name)
+qdrant_db.client.update_collection(
+    collection_name, hnsw_config=get_collection_config(collection_name).hnsw_config()
+)
+
+print(qdrant_db.get_collection(collection_name).payload_schema)
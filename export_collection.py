@@ -0,0 +1,36 @@
+import argparse
+
+from core.collection_export import export_collection, import_collection
+
+parser = argparse.ArgumentParser(
+    description="Export a collection to .npy shards and columnar payloads, or restore one."
+)
+commands = parser.add_subparsers(dest="command", required=True)
+
+export_parser = commands.add_parser("export")
+export_parser.add_argument("collection")
+export_parser.add_argument("path")
+export_parser.add_argument("--shard-size", type=int, default=4096)
+export_parser.add_argument("--dtype", choices=["float32", "float16"], default="float32")
+
+import_parser = commands.add_parser("import")
+import_parser.add_argument("path")
+import_parser.add_argument("--collection", default=None)
+import_parser.add_argument("--batch-size", type=int, default=256)
+import_parser.add_argument("--parallel", type=int, default=4)
+import_parser.add_argument("--checkpoint", default=None)
+
+args = parser.parse_args()
+
+if args.command == "export":
+    export_collection(
+        args.collection, args.path, shard_size=args.shard_size, dtype=args.dtype
+    )
+else:
+    import_collection(
+        args.path,
+        collection_name=args.collection,
+        batch_size=args.batch_size,
+        parallel=args.parallel,
+        checkpoint_path=args.checkpoint,
+    )
@@ -0,0 +1,41 @@
+import argparse
+
+from core.collection_config import get_collection_config
+from core.collection_migration import reembed_collection
+
+parser = argparse.ArgumentParser(
+    description="Re-embed a collection into a new one and switch an alias to it."
+)
+parser.add_argument("source")
+parser.add_argument("target")
+parser.add_argument("--alias", default=None)
+parser.add_argument("--batch-size", type=int, default=256)
+parser.add_argument("--parallel", type=int, default=4)
+parser.add_argument("--checkpoint", default=None)
+parser.add_argument("--drop-source", action="store_true")
+parser.add_argument("--model", default=None, help="Embedding model of the target")
+parser.add_argument("--dimensions", type=int, default=None)
+parser.add_argument(
+    "--quantization", choices=["none", "scalar", "binary"], default=None
+)
+args = parser.parse_args()
+
+overrides = {}
+if args.model:
+    overrides["model"] = args.model
+if args.dimensions:
+    overrides["dimensions"] = args.dimensions
+if args.quantization:
+    overrides["quantization"] = None if args.quantization == "none" else args.quantization
+config = get_collection_config(args.alias or args.target).model_copy(update=overrides)
+
+reembed_collection(
+    args.source,
+    args.target,
+    alias=args.alias,
+    config=config,
+    batch_size=args.batch_size,
+    parallel=args.parallel,
+    checkpoint_path=args.checkpoint,
+    drop_source=args.drop_source,
+)
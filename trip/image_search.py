@@ -5,37 +5,67 @@ from core.langchain_prompts import (
     VlogGenerationPrompt,
     MusicGenerationPrompt,
 )
-from core.langchain_init import openAIEmbeddings
-from core.vector_db import qdrant_db
+from core.langchain_init import get_embeddings
+from core.collection_config import IMAGE_VECTORS, get_collection_config
+from core.sparse_encoder import bm25_document_vector
+from core.exif import read_exif
+from core.vector_db import qdrant_db, async_qdrant_db, geo_radius, geo_bounding_box
 from .download_music import download_track
 from .video_gen import generate_video
+import asyncio
 import time
 import requests
 import uuid
 import json
 
 
-def upload_embedding(text: str, payload: dict):
-    embedding = openAIEmbeddings.embed_query(text)
-    qdrant_db.insert(
-        collection_name="image_descriptions", payload=payload, embedding=embedding
+def image_views(payload: dict):
+    return [payload["foreground"], payload["background"], payload["caption"]]
+
+
+def image_embeddings():
+    config = get_collection_config("image_descriptions")
+    return get_embeddings(config.model, config.dimensions)
+
+
+def image_vectors(payload: dict, embeddings: list):
+    vectors = dict(zip(IMAGE_VECTORS, embeddings))
+    config = get_collection_config("image_descriptions")
+    if config.sparse_vector:
+        vectors[config.sparse_vector] = bm25_document_vector(
+            " ".join(image_views(payload))
+        )
+    return vectors
+
+
+def image_point(payload: dict, embeddings: list):
+    return dict(
+        collection_name="image_descriptions",
+        payload=payload,
+        embedding=image_vectors(payload, embeddings),
     )
 
 
-def upload_image(caption: str, url: str, filename: str, user_id: int):
-    file_ext = filename.split(".")[-1]
-    file_name = f"{uuid.uuid4()}.{file_ext}"
+def upload_embedding(payload: dict):
+    embeddings = image_embeddings().embed_documents(image_views(payload))
+    qdrant_db.insert(**image_point(payload, embeddings))
 
-    response = requests.get(url)
-    with open(file_name, "wb") as file:
-        file.write(response.content)
 
-    output = ImageToTextPrompt.invoke({"image_path": file_name, "caption": caption})
+async def aupload_embedding(payload: dict):
+    embeddings = await image_embeddings().aembed_documents(image_views(payload))
+    await async_qdrant_db.insert(**image_point(payload, embeddings))
 
-    foreground = output.content.split("<foreground>")[1].split("</foreground>")[0]
-    background = output.content.split("<background>")[1].split("</background>")[0]
 
-    total = foreground + "\n" + background
+def build_image_payload(
+    content: str,
+    caption: str,
+    url: str,
+    filename: str,
+    user_id: int,
+    metadata: dict = None,
+):
+    foreground = content.split("<foreground>")[1].split("</foreground>")[0]
+    background = content.split("<background>")[1].split("</background>")[0]
 
     payload = {
         "user_id": user_id,
@@ -45,68 +75,182 @@ def upload_image(caption: str, url: str, filename: str, user_id: int):
         "foreground": foreground,
         "background": background,
         "created_at": int(time.time()),
+        **(metadata or {}),
     }
+    return payload
+
+
+def save_download(response, filename: str):
+    file_ext = filename.split(".")[-1]
+    file_name = f"{uuid.uuid4()}.{file_ext}"
+    with open(file_name, "wb") as file:
+        file.write(response.content)
+    return file_name
+
 
-    upload_embedding(foreground, payload)
-    upload_embedding(background, payload)
-    upload_embedding(caption, payload)
+def image_summary(payload: dict):
+    return payload["foreground"] + "\n" + payload["background"]
 
-    return total
 
+def upload_image(caption: str, url: str, filename: str, user_id: int):
+    file_name = save_download(requests.get(url), filename)
+
+    output = ImageToTextPrompt.invoke({"image_path": file_name, "caption": caption})
+    payload = build_image_payload(
+        output.content, caption, url, filename, user_id, read_exif(file_name)
+    )
+
+    upload_embedding(payload)
+
+    return image_summary(payload)
+
+
+async def aupload_image(caption: str, url: str, filename: str, user_id: int):
+    file_name = save_download(await asyncio.to_thread(requests.get, url), filename)
+
+    output = await ImageToTextPrompt.ainvoke(
+        {"image_path": file_name, "caption": caption}
+    )
+    payload = build_image_payload(
+        output.content, caption, url, filename, user_id, read_exif(file_name)
+    )
 
-def bag_of_words_scoring(text: str, search_text: str):
-    text = text.split(" ")
-    search_text = search_text.split(" ")
-    score = 0
-    for word in search_text:
-        if word in text:
-            score += 1
-    return score
+    await aupload_embedding(payload)
 
+    return image_summary(payload)
 
-def image_search(text: str, user_id: int):
-    results = qdrant_db.search(
+
+def search_response(results):
+    return {
+        "urls": [result.payload["url"] for result in results],
+        "ids": [str(result.id) for result in results],
+    }
+
+
+def location_filter(near: dict = None, bbox: dict = None):
+    """
+    Geo conditions on the EXIF location of photos. near is
+    {"lat", "lon", "radius_km"}; bbox is {"top", "left", "bottom", "right"}.
+    """
+    if near:
+        return {"location": geo_radius(near["lat"], near["lon"], near["radius_km"])}
+    if bbox:
+        return {
+            "location": geo_bounding_box(
+                bbox["top"], bbox["left"], bbox["bottom"], bbox["right"]
+            )
+        }
+    return {}
+
+
+def image_search_query(text: str, user_id: int, near: dict = None, bbox: dict = None):
+    return dict(
         collection_name="image_descriptions",
         query=text,
         limit=20,
+        filter={"user_id": user_id, **location_filter(near, bbox)},
+        using=IMAGE_VECTORS,
+        score_threshold=0.3,
+        hybrid=True,
+        profile="fast",
+        group_by="url",
+    )
+
+
+def image_search(text: str, user_id: int, near: dict = None, bbox: dict = None):
+    results = qdrant_db.search(**image_search_query(text, user_id, near, bbox))
+    return search_response(results)
+
+
+async def aimage_search(
+    text: str, user_id: int, near: dict = None, bbox: dict = None
+):
+    results = await async_qdrant_db.search(
+        **image_search_query(text, user_id, near, bbox)
+    )
+    return search_response(results)
+
+
+def similar_images_query(positive: list, user_id: int, negative: list = None):
+    return dict(
+        collection_name="image_descriptions",
+        positive=positive,
+        negative=negative,
+        limit=20,
         filter={"user_id": user_id},
+        using=IMAGE_VECTORS,
+        profile="fast",
+        group_by="url",
     )
-    urls = []
-    for result in results:
-        bow_score = bag_of_words_scoring(
-            result.payload["foreground"] + result.payload["background"], text
-        )
-        if result.score < 0.3 and bow_score == 0:
-            continue
-        urls.append(result.payload["url"])
-    urls = list(set(urls))
-    return {"urls": urls}
 
 
-def generate_vlog(start: int, end: int, user_id: int, authorization: str):
-    print("Calling generate blog...")
-    plans = requests.get(
-        "http://172.28.31.70:3000/api/v1/plans",
-        headers={"Authorization": authorization},
+def similar_images(positive: list, user_id: int, negative: list = None):
+    results = qdrant_db.recommend(**similar_images_query(positive, user_id, negative))
+    return search_response(results)
+
+
+async def asimilar_images(positive: list, user_id: int, negative: list = None):
+    results = await async_qdrant_db.recommend(
+        **similar_images_query(positive, user_id, negative)
     )
-    j = plans.json()
+    return search_response(results)
+
+
+PHOTO_FIELDS = [
+    "caption",
+    "created_at",
+    "foreground",
+    "background",
+    "url",
+    "location",
+]
 
-    results = qdrant_db.get_range(
-        start, end, collection_name="image_descriptions", filter={"user_id": user_id}
+
+def describe_photos(
+    start: int, end: int, user_id: int, near: dict = None, bbox: dict = None
+):
+    data = ""
+    results = qdrant_db.iter_range(
+        start,
+        end,
+        user_id,
+        collection_name="image_descriptions",
+        fields=PHOTO_FIELDS,
+        geo=location_filter(near, bbox),
     )
-    data = "TRIP DETAILS in MARKDOWN\n\n"
-    data += j[0]["data"]
-    index = 1
-    for result in results[0]:
+    for index, result in enumerate(results, start=1):
         data += "Image " + str(index) + "\n"
         data += f"Caption: {result.payload['caption']}\n"
         formatted_time = time.strftime(
             "%I:%M %p, %d %B %Y", time.localtime(result.payload["created_at"])
         )
         data += f"Date & Time: {formatted_time}\n"
+        if "location" in result.payload:
+            location = result.payload["location"]
+            data += f"Location: {location['lat']:.5f}, {location['lon']:.5f}\n"
         data += f"Description: {result.payload['foreground'] + result.payload['background']}\n"
         data += f"URL: {result.payload['url']}\n\n"
-        index += 1
+    return data
+
+
+def generate_vlog(
+    start: int,
+    end: int,
+    user_id: int,
+    authorization: str,
+    near: dict = None,
+    bbox: dict = None,
+):
+    print("Calling generate blog...")
+    plans = requests.get(
+        "http://172.28.31.70:3000/api/v1/plans",
+        headers={"Authorization": authorization},
+    )
+    j = plans.json()
+
+    data = "TRIP DETAILS in MARKDOWN\n\n"
+    data += j[0]["data"]
+    data += describe_photos(start, end, user_id, near, bbox)
     print(data)
     print("Generating vlog...")
     music_name = MusicGenerationPrompt.invoke({"trip_details": data}).content
@@ -128,30 +272,23 @@ def generate_vlog(start: int, end: int, user_id: int, authorization: str):
     return output_file
 
 
-def generate_blog(start: int, end: int, user_id: int, authorization: str):
+def generate_blog(
+    start: int,
+    end: int,
+    user_id: int,
+    authorization: str,
+    near: dict = None,
+    bbox: dict = None,
+):
     print("Calling generate blog...")
     plans = requests.get(
         "http://172.28.31.70:3000/api/v1/plans",
         headers={"Authorization": authorization},
     )
     j = plans.json()
-    results = qdrant_db.get_range(
-        start, end, user_id, collection_name="image_descriptions"
-    )
     data = "TRIP DETAILS in MARKDOWN\n\n"
     data += j[0]["data"]
-
-    index = 1
-    for result in results[0]:
-        data += "Image " + str(index) + "\n"
-        data += f"Caption: {result.payload['caption']}\n"
-        formatted_time = time.strftime(
-            "%I:%M %p, %d %B %Y", time.localtime(result.payload["created_at"])
-        )
-        data += f"Date & Time: {formatted_time}\n"
-        data += f"Description: {result.payload['foreground'] + result.payload['background']}\n"
-        data += f"URL: {result.payload['url']}\n\n"
-        index += 1
+    data += describe_photos(start, end, user_id, near, bbox)
     print(data)
     print("Generating blog...")
     x = BlogGenerationPrompt.invoke({"photos": data}).content